@@ -0,0 +1,37 @@
+import click
+from frappe.commands import pass_context, get_site
+from frappe.exceptions import SiteNotSpecifiedError
+
+
+@click.command("rebuild-textile-order-status")
+@click.option("--doctype", "doctypes", multiple=True,
+	help="Print Order, Pretreatment Order or Coating Order. All order types if not provided")
+@click.option("--from-date", help="Rebuild orders from this transaction date")
+@click.option("--to-date", help="Rebuild orders up to this transaction date")
+@click.option("--chunk-days", type=int, help="Number of days of orders rebuilt together")
+@click.option("--enqueue", is_flag=True, default=False, help="Rebuild date ranges in parallel background jobs")
+@click.option("--update-modified", is_flag=True, default=False, help="Update the modified timestamp of orders")
+@pass_context
+def rebuild_textile_order_status(context, doctypes=None, from_date=None, to_date=None, chunk_days=None,
+		enqueue=False, update_modified=False):
+	"""Recompute quantities and statuses of textile orders"""
+	import frappe
+	from textile.controllers.order_status_rebuild import rebuild_order_status
+
+	site = get_site(context)
+	if not site:
+		raise SiteNotSpecifiedError
+
+	frappe.init(site=site)
+	frappe.connect()
+	try:
+		rebuild_order_status(list(doctypes) or None, from_date=from_date, to_date=to_date, chunk_days=chunk_days,
+			enqueue=enqueue, update_modified=update_modified, commit=True)
+		frappe.db.commit()
+	finally:
+		frappe.destroy()
+
+
+commands = [
+	rebuild_textile_order_status,
+]
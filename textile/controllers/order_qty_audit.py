@@ -0,0 +1,127 @@
+import frappe
+import time
+from frappe.utils import flt, cint, now
+from textile.utils import bulk_insert_docs
+from textile.controllers.order_status_rebuild import (
+	rebuild_order_doctypes, order_aliases, get_order_condition, get_qty_aggregates, get_qty_target_table, rebuild_orders
+)
+
+
+# Stored order quantities are compared with their source transactions a chunk of orders at a time
+# until the time budget is used, continuing from the last audited order on the next run
+default_audit_time_budget = 120
+default_audit_chunk_size = 200
+audit_qty_tolerance = 0.001
+audit_cursor_key = "textile_order_qty_audit_cursor"
+
+
+def audit_order_qty():
+	time_budget = flt(frappe.conf.get("textile_order_qty_audit_time_budget")) or default_audit_time_budget
+	chunk_size = cint(frappe.conf.get("textile_order_qty_audit_chunk_size")) or default_audit_chunk_size
+	repair = cint(frappe.conf.get("textile_order_qty_audit_repair", 1))
+
+	cursor = get_audit_cursor()
+	start_time = time.monotonic()
+	completed_doctypes = set()
+
+	while time.monotonic() - start_time < time_budget:
+		names = frappe.db.sql_list(f"""
+			select name
+			from `tab{cursor.doctype}`
+			where docstatus = 1 and name > %s
+			order by name
+			limit %s
+		""", (cursor.name or "", chunk_size))
+
+		if names:
+			audit_orders(cursor.doctype, names, repair=repair)
+			cursor.name = names[-1]
+
+		if len(names) < chunk_size:
+			completed_doctypes.add(cursor.doctype)
+			cursor.doctype = get_next_audit_doctype(cursor.doctype)
+			cursor.name = None
+
+		set_audit_cursor(cursor)
+		frappe.db.commit()
+
+		# Stop after all orders have been audited once in the same run
+		if len(completed_doctypes) == len(rebuild_order_doctypes):
+			break
+
+
+def audit_orders(doctype, names, repair=True):
+	drift = get_order_qty_drift(doctype, names)
+	if not drift:
+		return []
+
+	if repair:
+		rebuild_orders(doctype, {"names": list(set(d.order_name for d in drift))})
+
+	log_order_qty_drift(doctype, drift, repaired=repair)
+	return drift
+
+
+def get_order_qty_drift(doctype, names):
+	filters = {"names": names, "tolerance": audit_qty_tolerance}
+	order_condition = get_order_condition(doctype, filters)
+	alias = order_aliases[doctype]
+
+	drift = []
+	for aggregate in get_qty_aggregates(doctype, order_condition):
+		rows = frappe.db.sql(f"""
+			select {alias}.name as order_name, target.name as row_name,
+				ifnull(target.`{aggregate.qty_field}`, 0) as stored_qty, ifnull(agg.qty, 0) as actual_qty
+			from {get_qty_target_table(doctype, aggregate.doctype)}
+			left join ({aggregate.query}) agg on agg.name = target.name
+			where {order_condition}
+				and abs(ifnull(target.`{aggregate.qty_field}`, 0) - ifnull(agg.qty, 0)) > %(tolerance)s
+		""", filters, as_dict=1)
+
+		for d in rows:
+			d.qty_field = aggregate.qty_field
+			drift.append(d)
+
+	return drift
+
+
+def log_order_qty_drift(doctype, drift, repaired=False):
+	timestamp = now()
+
+	logs = []
+	for d in drift:
+		log = frappe.get_doc({
+			"doctype": "Textile Order Qty Drift",
+			"order_doctype": doctype,
+			"order_name": d.order_name,
+			"row_name": d.row_name if d.row_name != d.order_name else None,
+			"qty_field": d.qty_field,
+			"stored_qty": flt(d.stored_qty),
+			"actual_qty": flt(d.actual_qty),
+			"difference": flt(d.actual_qty) - flt(d.stored_qty),
+			"repaired": cint(repaired),
+		})
+
+		log.set_new_name()
+		log.owner = log.modified_by = frappe.session.user
+		log.creation = log.modified = timestamp
+		logs.append(log)
+
+	bulk_insert_docs(logs)
+
+
+def get_audit_cursor():
+	cursor = frappe._dict(frappe.parse_json(frappe.db.get_global(audit_cursor_key) or "{}"))
+	if cursor.doctype not in rebuild_order_doctypes:
+		cursor = frappe._dict({"doctype": rebuild_order_doctypes[0], "name": None})
+
+	return cursor
+
+
+def set_audit_cursor(cursor):
+	frappe.db.set_global(audit_cursor_key, frappe.as_json({"doctype": cursor.doctype, "name": cursor.name}))
+
+
+def get_next_audit_doctype(doctype):
+	index = rebuild_order_doctypes.index(doctype)
+	return rebuild_order_doctypes[(index + 1) % len(rebuild_order_doctypes)]
@@ -0,0 +1,284 @@
+import frappe
+from frappe.utils import getdate, add_days, cint
+from textile.controllers.order_status_updater import get_orders_for_status_update
+
+
+# Quantities are aggregated with one UPDATE per column for all orders in a date range,
+# statuses are then derived from the stored quantities without aggregating again
+# and written with one UPDATE per chunk of orders
+rebuild_order_doctypes = ["Print Order", "Pretreatment Order", "Coating Order"]
+default_rebuild_chunk_days = 30
+
+order_aliases = {
+	"Print Order": "po",
+	"Pretreatment Order": "pto",
+	"Coating Order": "co",
+}
+
+rebuild_status_fields = {
+	"Print Order": [
+		"fabric_transfer_qty", "fabric_transfer_status",
+		"per_ordered", "per_work_ordered", "per_produced", "per_packed", "per_delivered",
+		"production_status", "packing_status", "delivery_status", "status",
+	],
+	"Pretreatment Order": [
+		"per_ordered", "per_work_ordered", "per_produced", "per_packed", "per_delivered",
+		"production_status", "packing_status", "delivery_status", "status",
+	],
+	"Coating Order": ["per_coated", "coating_status", "actual_end_date", "status"],
+}
+
+
+def rebuild_order_status(doctypes=None, from_date=None, to_date=None, chunk_days=None, enqueue=False,
+		update_modified=False, commit=False):
+	doctypes = doctypes or rebuild_order_doctypes
+	chunk_days = cint(chunk_days) or default_rebuild_chunk_days
+
+	for doctype in doctypes:
+		for chunk_from_date, chunk_to_date in get_rebuild_chunks(doctype, from_date, to_date, chunk_days):
+			if enqueue:
+				frappe.enqueue("textile.controllers.order_status_rebuild.rebuild_order_status_chunk",
+					queue="long", timeout=3600,
+					job_id=f"rebuild_order_status::{doctype}::{chunk_from_date}::{chunk_to_date}", deduplicate=True,
+					doctype=doctype, from_date=chunk_from_date, to_date=chunk_to_date, update_modified=update_modified)
+			else:
+				rebuild_order_status_chunk(doctype, chunk_from_date, chunk_to_date, update_modified=update_modified)
+				if commit:
+					frappe.db.commit()
+
+
+def get_rebuild_chunks(doctype, from_date=None, to_date=None, chunk_days=default_rebuild_chunk_days):
+	date_range = frappe.db.sql(f"""
+		select min(transaction_date), max(transaction_date)
+		from `tab{doctype}`
+		where docstatus = 1
+	""")
+
+	min_date, max_date = date_range[0] if date_range else (None, None)
+	if not min_date:
+		return []
+
+	from_date = max(getdate(from_date), min_date) if from_date else min_date
+	to_date = min(getdate(to_date), max_date) if to_date else max_date
+
+	chunks = []
+	while from_date <= to_date:
+		chunk_to_date = min(add_days(from_date, chunk_days - 1), to_date)
+		chunks.append((from_date, chunk_to_date))
+		from_date = add_days(chunk_to_date, 1)
+
+	return chunks
+
+
+def rebuild_order_status_chunk(doctype, from_date, to_date, update_modified=False):
+	return rebuild_orders(doctype, {"from_date": getdate(from_date), "to_date": getdate(to_date)},
+		update_modified=update_modified)
+
+
+def rebuild_orders(doctype, filters, update_modified=False):
+	# Filters are either from_date and to_date or a list of order names
+	order_condition = get_order_condition(doctype, filters)
+
+	for aggregate in get_qty_aggregates(doctype, order_condition):
+		frappe.db.sql(f"""
+			update {get_qty_target_table(doctype, aggregate.doctype)}
+			left join ({aggregate.query}) agg on agg.name = target.name
+			set target.`{aggregate.qty_field}` = ifnull(agg.qty, 0)
+			where {order_condition}
+		""", filters)
+
+	if doctype == "Pretreatment Order":
+		rebuild_subcontractable_qty(order_condition, filters)
+
+	alias = order_aliases[doctype]
+	names = frappe.db.sql_list(f"""
+		select {alias}.name
+		from `tab{doctype}` {alias}
+		where {order_condition}
+	""", filters)
+
+	# Completion statuses and percentages follow the order controllers and StatusUpdater's allowance rules,
+	# so they are derived per order in Python and only the reads and writes are done per chunk
+	status_updates = {}
+	for doc in get_orders_for_status_update(doctype, names):
+		if doctype == "Coating Order":
+			doc.set_coating_status(use_stored_qty=True)
+		else:
+			if doctype == "Print Order":
+				doc.set_fabric_transfer_status(use_stored_qty=True)
+
+			# Empty row names use the stored quantities of all rows
+			doc.set_sales_order_status(row_names=[])
+			doc.set_production_packing_status(row_names=[])
+			doc.set_delivery_status(row_names=[])
+
+		doc.set_status()
+		status_updates[doc.name] = {fieldname: doc.get(fieldname) for fieldname in rebuild_status_fields[doctype]}
+
+	frappe.db.bulk_update(doctype, status_updates, update_modified=update_modified)
+	for name in status_updates:
+		frappe.clear_document_cache(doctype, name)
+
+	return len(names)
+
+
+def rebuild_subcontractable_qty(order_condition, filters):
+	# Subcontractable Qty of a Work Order is calculated by ERPNext so it is summed here and written in one UPDATE
+	from erpnext.manufacturing.doctype.work_order.work_order import get_subcontractable_qty
+
+	work_order_data = frappe.db.sql(f"""
+		select pto.name, wo.name as work_order,
+			wo.producible_qty, wo.material_transferred_for_manufacturing, wo.produced_qty, wo.scrap_qty
+		from `tabPretreatment Order` pto
+		left join `tabWork Order` wo on wo.pretreatment_order = pto.name and wo.docstatus = 1
+		where {order_condition}
+	""", filters, as_dict=1)
+
+	subcontractable_qty_map = {}
+	for d in work_order_data:
+		subcontractable_qty_map.setdefault(d.name, 0)
+		if d.work_order:
+			subcontractable_qty_map[d.name] += max(get_subcontractable_qty(
+				d.producible_qty,
+				d.material_transferred_for_manufacturing,
+				d.produced_qty,
+				d.scrap_qty
+			), 0)
+
+	frappe.db.bulk_update("Pretreatment Order", {
+		name: {"subcontractable_qty": qty} for name, qty in subcontractable_qty_map.items()
+	}, update_modified=False)
+
+
+def get_order_condition(doctype, filters):
+	alias = order_aliases[doctype]
+
+	if filters.get("names") is not None:
+		return f"{alias}.docstatus = 1 and {alias}.name in %(names)s"
+	else:
+		return f"{alias}.docstatus = 1 and {alias}.transaction_date between %(from_date)s and %(to_date)s"
+
+
+def get_qty_target_table(doctype, target_doctype):
+	alias = order_aliases[doctype]
+	join_field = "name" if target_doctype == doctype else "parent"
+
+	return f"`tab{target_doctype}` target inner join `tab{doctype}` {alias} on {alias}.name = target.{join_field}"
+
+
+def get_qty_aggregates(doctype, order_condition):
+	# Each query returns the quantity of the Order or Order Item name for orders matching the condition
+	if doctype == "Print Order":
+		return [
+			frappe._dict(doctype="Print Order Item", qty_field="ordered_qty", query=f"""
+				select i.print_order_item as name, sum(i.stock_qty) as qty
+				from `tabSales Order Item` i
+				inner join `tabSales Order` s on s.name = i.parent
+				inner join `tabPrint Order` po on po.name = i.print_order
+				where s.docstatus = 1 and {order_condition}
+				group by i.print_order_item
+			"""),
+			frappe._dict(doctype="Print Order Item", qty_field="work_order_qty", query=f"""
+				select wo.print_order_item as name, sum(wo.qty) as qty
+				from `tabWork Order` wo
+				inner join `tabPrint Order` po on po.name = wo.print_order
+				where wo.docstatus = 1 and {order_condition}
+				group by wo.print_order_item
+			"""),
+			frappe._dict(doctype="Print Order Item", qty_field="produced_qty", query=f"""
+				select wo.print_order_item as name, sum(wo.completed_qty) as qty
+				from `tabWork Order` wo
+				inner join `tabPrint Order` po on po.name = wo.print_order
+				where wo.docstatus = 1 and {order_condition}
+				group by wo.print_order_item
+			"""),
+			frappe._dict(doctype="Print Order Item", qty_field="packed_qty", query=f"""
+				select i.print_order_item as name, sum(i.packed_qty * i.conversion_factor) as qty
+				from `tabSales Order Item` i
+				inner join `tabPrint Order` po on po.name = i.print_order
+				where i.docstatus = 1 and {order_condition}
+				group by i.print_order_item
+			"""),
+			frappe._dict(doctype="Print Order Item", qty_field="delivered_qty", query=f"""
+				select i.print_order_item as name, sum(i.delivered_qty * i.conversion_factor) as qty
+				from `tabSales Order Item` i
+				inner join `tabPrint Order` po on po.name = i.print_order
+				where i.docstatus = 1 and {order_condition}
+				group by i.print_order_item
+			"""),
+			frappe._dict(doctype="Print Order", qty_field="fabric_transfer_qty", query=f"""
+				select ste.print_order as name, sum(if(i.t_warehouse = po.wip_warehouse, i.stock_qty, -1 * i.stock_qty)) as qty
+				from `tabStock Entry Detail` i
+				inner join `tabStock Entry` ste on ste.name = i.parent
+				inner join `tabPrint Order` po on po.name = ste.print_order
+				where ste.docstatus = 1
+					and ste.purpose in ('Material Transfer', 'Material Transfer for Manufacture')
+					and i.item_code = po.fabric_item
+					and (i.t_warehouse = po.wip_warehouse or i.s_warehouse = po.wip_warehouse)
+					and {order_condition}
+				group by ste.print_order
+			"""),
+		]
+
+	elif doctype == "Pretreatment Order":
+		return [
+			frappe._dict(doctype="Pretreatment Order", qty_field="ordered_qty", query=f"""
+				select i.pretreatment_order as name, sum(i.stock_qty) as qty
+				from `tabSales Order Item` i
+				inner join `tabSales Order` s on s.name = i.parent
+				inner join `tabPretreatment Order` pto on pto.name = i.pretreatment_order
+				where s.docstatus = 1 and {order_condition}
+				group by i.pretreatment_order
+			"""),
+			frappe._dict(doctype="Pretreatment Order", qty_field="work_order_qty", query=f"""
+				select wo.pretreatment_order as name, sum(wo.qty) as qty
+				from `tabWork Order` wo
+				inner join `tabPretreatment Order` pto on pto.name = wo.pretreatment_order
+				where wo.docstatus = 1 and {order_condition}
+				group by wo.pretreatment_order
+			"""),
+			frappe._dict(doctype="Pretreatment Order", qty_field="produced_qty", query=f"""
+				select wo.pretreatment_order as name, sum(wo.completed_qty) as qty
+				from `tabWork Order` wo
+				inner join `tabPretreatment Order` pto on pto.name = wo.pretreatment_order
+				where wo.docstatus = 1 and {order_condition}
+				group by wo.pretreatment_order
+			"""),
+			frappe._dict(doctype="Pretreatment Order", qty_field="packed_qty", query=f"""
+				select i.pretreatment_order as name, sum(i.packed_qty * i.conversion_factor) as qty
+				from `tabSales Order Item` i
+				inner join `tabPretreatment Order` pto on pto.name = i.pretreatment_order
+				where i.docstatus = 1 and i.item_code = pto.ready_fabric_item and {order_condition}
+				group by i.pretreatment_order
+			"""),
+			frappe._dict(doctype="Pretreatment Order", qty_field="delivered_qty", query=f"""
+				select i.pretreatment_order as name, sum(i.delivered_qty * i.conversion_factor) as qty
+				from `tabSales Order Item` i
+				inner join `tabPretreatment Order` pto on pto.name = i.pretreatment_order
+				where i.docstatus = 1 and i.item_code = pto.ready_fabric_item and {order_condition}
+				group by i.pretreatment_order
+			"""),
+		]
+
+	elif doctype == "Coating Order":
+		return [
+			frappe._dict(doctype="Coating Order", qty_field="coated_qty", query=f"""
+				select ste.coating_order as name, sum(ste.fg_completed_qty) as qty
+				from `tabStock Entry` ste
+				inner join `tabCoating Order` co on co.name = ste.coating_order
+				where ste.docstatus = 1 and ste.purpose = 'Manufacture' and {order_condition}
+				group by ste.coating_order
+			"""),
+		]
+
+	return []
+
+
+@frappe.whitelist()
+def enqueue_order_status_rebuild(doctypes=None, from_date=None, to_date=None, chunk_days=None):
+	frappe.only_for("System Manager")
+
+	if isinstance(doctypes, str):
+		doctypes = frappe.parse_json(doctypes)
+
+	rebuild_order_status(doctypes, from_date=from_date, to_date=to_date, chunk_days=chunk_days, enqueue=True)
@@ -0,0 +1,219 @@
+import frappe
+import copy
+from frappe import _
+from frappe.utils import flt
+from frappe.model import default_fields, child_table_fields, no_value_fields
+from contextlib import contextmanager
+
+
+# Status roll-ups of textile orders are queued and run once per order instead of once per transaction row
+status_update_methods = [
+	"set_item_creation_status",
+	"set_fabric_transfer_status",
+	"set_sales_order_status",
+	"set_production_packing_status",
+	"set_delivery_status",
+	"update_order_progress",
+]
+
+# Long text and attachment columns are not used by status methods and are not loaded for status updates
+status_update_excluded_fieldtypes = [
+	"Attach",
+	"Attach Image",
+	"Code",
+	"HTML Editor",
+	"JSON",
+	"Long Text",
+	"Markdown Editor",
+	"Signature",
+	"Small Text",
+	"Text",
+	"Text Editor",
+]
+
+
+def queue_order_status_update(doctype, name, status_methods, validate_methods=None, from_doctype=None, row_names=None,
+		validate_row_names=None):
+	if not name or (doctype, name) in get_skipped_orders():
+		return
+
+	pending_updates = get_pending_updates()
+	update = pending_updates.setdefault((doctype, name), frappe._dict({
+		"status_methods": {},
+		"validate_methods": {},
+	}))
+
+	# Methods are called with the affected row names, or for all rows if any caller did not limit the rows
+	for method in status_methods:
+		update.status_methods[method] = merge_row_names(update.status_methods.get(method, set()), row_names)
+
+	for method in validate_methods or []:
+		if method not in update.validate_methods:
+			update.validate_methods[method] = frappe._dict({"from_doctype": from_doctype, "row_names": set()})
+
+		validation = update.validate_methods[method]
+		validation.from_doctype = validation.from_doctype or from_doctype
+		validation.row_names = merge_row_names(validation.row_names,
+			row_names if validate_row_names is None else validate_row_names)
+
+	# Queued updates of all documents in the transaction are run once just before commit
+	if not frappe.flags.textile_order_status_flush_registered:
+		frappe.flags.textile_order_status_flush_registered = True
+		frappe.db.before_commit.add(flush_order_status_updates)
+		frappe.db.after_rollback.add(clear_order_status_updates)
+
+
+def flush_order_status_updates():
+	pending_updates = get_pending_updates()
+	frappe.flags.textile_order_status_flush_registered = False
+
+	while pending_updates:
+		(doctype, name), update = next(iter(pending_updates.items()))
+		del pending_updates[(doctype, name)]
+
+		doc = get_order_for_status_update(doctype, name)
+
+		for method in status_update_methods:
+			if method in update.status_methods and hasattr(doc, method):
+				method_row_names = update.status_methods[method]
+				if method_row_names is None or method not in getattr(doc, "row_scoped_methods", []):
+					getattr(doc, method)(update=True)
+				else:
+					getattr(doc, method)(update=True, row_names=list(method_row_names))
+
+		for method, validation in update.validate_methods.items():
+			kwargs = {"from_doctype": validation.from_doctype}
+			if validation.row_names is not None and method in getattr(doc, "row_scoped_methods", []):
+				kwargs["row_names"] = list(validation.row_names)
+
+			getattr(doc, method)(**kwargs)
+
+		doc.set_status(update=True)
+		doc.notify_update()
+
+
+def get_order_for_status_update(doctype, name):
+	meta = frappe.get_meta(doctype)
+
+	order = frappe.db.get_value(doctype, name, get_status_update_fields(meta), as_dict=1)
+	if not order:
+		frappe.throw(_("{0} {1} not found").format(_(doctype), name), frappe.DoesNotExistError)
+
+	order.doctype = doctype
+	for df in meta.get_table_fields():
+		order[df.fieldname] = frappe.get_all(df.options,
+			filters={"parent": name, "parenttype": doctype, "parentfield": df.fieldname},
+			fields=get_status_update_fields(frappe.get_meta(df.options)),
+			order_by="idx asc")
+
+	doc = frappe.get_doc(copy.deepcopy(order))
+	doc.flags.loaded_for_status_update = True
+
+	# Previous values are taken from the same rows so that db_set does not load the full document again
+	doc_before_save = frappe.get_doc(copy.deepcopy(order))
+	doc._doc_before_save = doc_before_save
+	for df in meta.get_table_fields():
+		for d, d_before_save in zip(doc.get(df.fieldname), doc_before_save.get(df.fieldname)):
+			d._doc_before_save = d_before_save
+
+	return doc
+
+
+def get_orders_for_status_update(doctype, names):
+	# Loads many orders with one query per table, for status updates that are not written with db_set
+	if not names:
+		return []
+
+	meta = frappe.get_meta(doctype)
+
+	orders = frappe.get_all(doctype, filters={"name": ["in", names]}, fields=get_status_update_fields(meta),
+		order_by="name")
+
+	table_rows = {}
+	for df in meta.get_table_fields():
+		for d in frappe.get_all(df.options,
+				filters={"parent": ["in", names], "parenttype": doctype, "parentfield": df.fieldname},
+				fields=get_status_update_fields(frappe.get_meta(df.options)),
+				order_by="parent, idx asc"):
+			table_rows.setdefault((d.parent, df.fieldname), []).append(d)
+
+	docs = []
+	for order in orders:
+		order.doctype = doctype
+		for df in meta.get_table_fields():
+			order[df.fieldname] = table_rows.get((order.name, df.fieldname), [])
+
+		doc = frappe.get_doc(order)
+		doc.flags.loaded_for_status_update = True
+		docs.append(doc)
+
+	return docs
+
+
+def get_status_update_fields(meta):
+	fields = [f for f in default_fields if f != "doctype"]
+	if meta.istable:
+		fields += list(child_table_fields)
+
+	for df in meta.fields:
+		if df.fieldtype in no_value_fields or df.fieldtype in status_update_excluded_fieldtypes or df.get("is_virtual"):
+			continue
+		fields.append(df.fieldname)
+
+	return fields
+
+
+def merge_row_names(row_names, new_row_names):
+	if row_names is None or new_row_names is None:
+		return None
+
+	return row_names | set(new_row_names)
+
+
+def update_order_qty(doctype, qty_field, qty_map):
+	# Quantities are changed in place so that concurrent transactions do not overwrite each other
+	for name, qty in qty_map.items():
+		if name and flt(qty):
+			frappe.db.sql(f"""
+				UPDATE `tab{doctype}`
+				SET `{qty_field}` = ifnull(`{qty_field}`, 0) + %s
+				WHERE name = %s
+			""", (flt(qty), name))
+
+
+def get_qty_sign(doc):
+	# Submitted quantities are added and cancelled quantities removed, any other change is aggregated again
+	return {"submit": 1, "cancel": -1}.get(doc.get("_action"))
+
+
+def clear_order_status_updates():
+	frappe.flags.textile_order_status_updates = {}
+	frappe.flags.textile_order_status_flush_registered = False
+
+
+@contextmanager
+def skip_order_status_updates(doctype, name):
+	# Updates for the order are dropped while the caller updates it at the end itself
+	skipped_orders = get_skipped_orders()
+	already_skipped = (doctype, name) in skipped_orders
+	skipped_orders.add((doctype, name))
+
+	try:
+		yield
+	finally:
+		if not already_skipped:
+			skipped_orders.discard((doctype, name))
+
+
+def get_pending_updates():
+	if frappe.flags.textile_order_status_updates is None:
+		frappe.flags.textile_order_status_updates = {}
+
+	return frappe.flags.textile_order_status_updates
+
+
+def get_skipped_orders():
+	if frappe.flags.textile_order_status_updates_skipped is None:
+		frappe.flags.textile_order_status_updates_skipped = set()
+
+	return frappe.flags.textile_order_status_updates_skipped
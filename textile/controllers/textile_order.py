@@ -8,6 +8,14 @@ from erpnext.stock.get_item_details import get_bin_details, is_item_uom_converti
 
 
 class TextileOrder(StatusUpdaterERP):
+	def save(self, *args, **kwargs):
+		if self.flags.loaded_for_status_update:
+			frappe.throw(_("{0} {1} is loaded only for status update and cannot be saved").format(
+				_(self.doctype), self.name
+			))
+
+		return super().save(*args, **kwargs)
+
 	def set_title(self, fabric_material, qty):
 		fabric_material_abbr = None
 		if fabric_material:
@@ -127,6 +135,25 @@ class TextileOrder(StatusUpdaterERP):
 		bin_details = get_bin_details(fabric_item, fabric_warehouse)
 		return flt(bin_details.get("actual_qty"))
 
+	def make_work_orders(self, work_order_items, on_batch_complete=None, batch_size=50,
+			ignore_permissions=False, ignore_version=True, ignore_feed=True):
+		from erpnext.manufacturing.doctype.work_order.work_order import _create_work_orders
+
+		if not work_order_items:
+			return []
+
+		# Order status is updated once before commit instead of on every Work Order submit
+		wo_list = []
+		for i in range(0, len(work_order_items), batch_size):
+			batch = work_order_items[i:i + batch_size]
+			wo_list += _create_work_orders(batch, self.company,
+				ignore_permissions=ignore_permissions, ignore_version=ignore_version, ignore_feed=ignore_feed)
+
+			if on_batch_complete:
+				on_batch_complete(batch, i + len(batch), len(work_order_items))
+
+		return wo_list
+
 	@staticmethod
 	def add_components_to_bom(bom_doc, components, fabric_gsm, fabric_width, fabric_per_pickup):
 		for component in components:
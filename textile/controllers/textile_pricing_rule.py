@@ -1,6 +1,24 @@
 import frappe
+import itertools
+import hashlib
+import copy
+from bisect import bisect_right
 from frappe.utils import flt, cint
 from frappe.model.document import Document
+from textile.utils import get_rule_table, clear_rule_table
+
+
+# Resolved rates are memoized by pricing signature under a version that is replaced on any pricing change
+pricing_version_key = "textile_pricing_version"
+pricing_memo_expiry = 24 * 60 * 60
+
+# Item Price fields used when getting the rate of the fabric
+fabric_price_args = [
+	"customer", "supplier", "uom", "stock_uom", "conversion_factor", "qty",
+	"transaction_date", "posting_date", "batch_no", "price_list_uom_dependant", "ignore_party",
+]
+
+fabric_item_types = ["Greige Fabric", "Ready Fabric"]
 
 
 class TextilePricingRule(Document):
@@ -10,6 +28,9 @@ class TextilePricingRule(Document):
 	match_fields = ['price_list', 'customer_group', 'fabric_material', 'fabric_type']
 	range_fields = ['fabric_width', 'fabric_gsm']
 
+	# Rules are indexed by these match fields, a rule without a value is in the bucket for any value
+	bucket_fields = ['price_list', 'fabric_material', 'fabric_type']
+
 	filter_fields = (
 		match_fields
 		+ [f"{f}_lower_limit" for f in range_fields]
@@ -28,13 +49,24 @@ class TextilePricingRule(Document):
 	def after_rename(self, old_name, new_name, merge):
 		self.clear_pricing_rule_cache()
 
+	def after_delete(self):
+		self.clear_pricing_rule_cache()
+
 	@classmethod
 	def clear_pricing_rule_cache(cls):
-		frappe.cache().delete_value(cls.cache_field)
+		clear_rule_table(cls.get_rule_index_cache_key())
+		bump_pricing_version()
 
 	@classmethod
 	def get_applied_rule(cls, item_code, price_list, customer=None):
 		filters = cls.get_filters_dict(item_code, price_list, customer)
+		signature = (customer or None, sorted(filters.items()))
+
+		return get_pricing_memo(f"{cls.cache_field}_applied_rule", signature,
+			lambda: cls.get_applied_rule_for_filters(filters, customer))
+
+	@classmethod
+	def get_applied_rule_for_filters(cls, filters, customer=None):
 		applicable_rules = cls.get_applicable_rules_for_filters(filters)
 
 		base_rate_rule = cls.get_base_rate_rule(applicable_rules, customer)
@@ -69,96 +101,123 @@ class TextilePricingRule(Document):
 		if not filters:
 			filters = frappe._dict()
 
-		rules = cls.get_rule_docs()
+		rule_index = cls.get_rule_index()
+
+		# Only buckets of rules matching the filter value or not requiring a value are checked
+		bucket_keys = itertools.product(*[
+			(filters.get(f), None) if filters.get(f) else (None,)
+			for f in cls.bucket_fields
+		])
+
+		candidate_rules = []
+		for key in bucket_keys:
+			bucket = rule_index.buckets.get(key)
+			if bucket:
+				candidate_rules += cls.get_range_candidates(bucket, filters)
+
+		# Bounds of the customer's group are taken from the same snapshot as the bounds of rule groups
+		customer_group_bounds = rule_index.customer_group_bounds.get(filters.get("customer_group"))
 
 		applicable_rules = []
-		for rule in rules:
-			rule_dict = rule.get_applicable_rule_dict(filters)
-			if rule_dict:
-				applicable_rules.append(rule_dict)
+		for rule in sorted(candidate_rules, key=lambda d: d.position):
+			if rule.customer_group:
+				if not cls.is_within_tree_bounds(rule.customer_group_bounds, customer_group_bounds):
+					continue
+
+			rule_dict = frappe._dict({
+				"name": rule.name,
+				"type": rule.type,
+				"value": rule.value,
+				"required_filters": frappe._dict(rule.required_filters),
+			})
+
+			if rule.customer_group:
+				rule_dict['customer_group_lft'] = rule.customer_group_bounds[0]
+
+			applicable_rules.append(rule_dict)
 
 		return applicable_rules
 
-	def get_applicable_rule_dict(self, filters):
-		match_filters = self.get_match_filters()
-		range_filters = self.get_range_filters()
+	@classmethod
+	def get_range_candidates(cls, bucket, filters):
+		# Rules in a bucket are sorted by the lower limit of the first range field
+		first_range_value = flt(filters.get(cls.range_fields[0]))
+		rules = bucket["rules"][:bisect_right(bucket["lower_limits"], first_range_value)]
 
-		if not match_filters and not range_filters:
-			# global rule, applicable to all
-			required_filters_matched = True
-		else:
-			required_filters_matched = True
-
-			if match_filters:
-				for field, required_value in match_filters.items():
-					if field == "customer_group":
-						if not self.match_tree("Customer Group", required_value, filters.get(field)):
-							required_filters_matched = False
-							break
-					elif filters.get(field) != required_value:
-						required_filters_matched = False
-						break
-
-			if range_filters:
-				for field, conditions in range_filters.items():
-					for operator, val2 in conditions:
-						if not frappe.compare(flt(filters.get(field)), operator, val2):
-							required_filters_matched = False
-							break
-
-		if required_filters_matched:
-			return self.get_rule_match_dict(match_filters)
-		else:
-			return None
+		candidates = []
+		for rule in rules:
+			for field, (lower_limit, upper_limit) in rule.limits.items():
+				value = flt(filters.get(field))
+				if value < lower_limit or value > upper_limit:
+					break
+			else:
+				candidates.append(rule)
 
-	@staticmethod
-	def match_tree(doctype, required, actual):
-		meta = frappe.get_meta(doctype)
-		parent_field = meta.nsm_parent_field
-
-		actual_ancestors = []
-		if actual:
-			current_name = actual
-			while current_name:
-				current_doc = frappe.get_cached_doc(doctype, current_name)
-				actual_ancestors.append(current_doc.name)
-				current_name = current_doc.get(parent_field)
-
-		return required in actual_ancestors
-
-	def get_match_filters(self):
-		required_filters = frappe._dict()
-		for f in self.match_fields:
-			if self.get(f):
-				required_filters[f] = self.get(f)
-
-		return required_filters
-
-	def get_range_filters(self):
-		required_filters = frappe._dict()
-		for f in self.range_fields:
-			lower_limit_field = f"{f}_lower_limit"
-			upper_limit_field = f"{f}_upper_limit"
-
-			if self.get(lower_limit_field):
-				required_filters.setdefault(f, []).append((">=", flt(self.get(lower_limit_field))))
-			if self.get(upper_limit_field):
-				required_filters.setdefault(f, []).append(("<=", flt(self.get(upper_limit_field))))
-
-		return required_filters
-
-	def get_rule_match_dict(self, match_filters):
-		rule_dict = frappe._dict({
-			"name": self.name,
-			"type": self.type,
-			"value": flt(self.value),
-			"required_filters": match_filters,
+		return candidates
+
+	@classmethod
+	def get_rule_index(cls):
+		return get_rule_table(cls.get_rule_index_cache_key(), cls.compile_rule_index)
+
+	@classmethod
+	def get_rule_index_cache_key(cls):
+		return f"{cls.cache_field}_index"
+
+	@classmethod
+	def compile_rule_index(cls):
+		rules = frappe.get_all(cls.doctype, fields=["name", "type", "value"] + cls.filter_fields)
+
+		# Nested set bounds are renumbered with queries that do not clear cached documents, so they are read uncached
+		customer_group_bounds = {
+			d.name: (cint(d.lft), cint(d.rgt))
+			for d in frappe.get_all("Customer Group", fields=["name", "lft", "rgt"])
+		}
+
+		rule_index = {}
+		for position, rule in enumerate(rules):
+			compiled_rule = frappe._dict({
+				"position": position,
+				"name": rule.name,
+				"type": rule.type,
+				"value": flt(rule.value),
+				"customer_group": rule.customer_group,
+				"customer_group_bounds": None,
+				"required_filters": {f: rule.get(f) for f in cls.match_fields if rule.get(f)},
+				"limits": {},
+			})
+
+			if rule.customer_group:
+				compiled_rule.customer_group_bounds = customer_group_bounds.get(rule.customer_group)
+
+			# Unset limits do not restrict the range
+			for f in cls.range_fields:
+				lower_limit = flt(rule.get(f"{f}_lower_limit"))
+				upper_limit = flt(rule.get(f"{f}_upper_limit"))
+				compiled_rule.limits[f] = (lower_limit or float("-inf"), upper_limit or float("inf"))
+
+			key = tuple(rule.get(f) or None for f in cls.bucket_fields)
+			rule_index.setdefault(key, []).append(compiled_rule)
+
+		first_range_field = cls.range_fields[0]
+		for key, bucket_rules in rule_index.items():
+			bucket_rules = sorted(bucket_rules, key=lambda d: d.limits[first_range_field][0])
+			rule_index[key] = {
+				"lower_limits": [d.limits[first_range_field][0] for d in bucket_rules],
+				"rules": bucket_rules,
+			}
+
+		return frappe._dict({
+			"buckets": rule_index,
+			"customer_group_bounds": customer_group_bounds,
 		})
 
-		if self.get('customer_group'):
-			rule_dict['customer_group_lft'] = frappe.get_cached_value("Customer Group", self.get('customer_group'), 'lft')
+	@staticmethod
+	def is_within_tree_bounds(ancestor_bounds, bounds):
+		# A node is its own ancestor, descendants are nested within the lft and rgt of their ancestors
+		if not ancestor_bounds or not bounds:
+			return False
 
-		return rule_dict
+		return ancestor_bounds[0] <= bounds[0] and bounds[1] <= ancestor_bounds[1]
 
 	@classmethod
 	def get_filters_dict(cls, item_code, price_list, customer):
@@ -232,20 +291,6 @@ class TextilePricingRule(Document):
 	@classmethod
 	def is_fixed_base_rate(cls, customer):
 		return False
-	
-	@classmethod
-	def get_rule_docs(cls):
-		names = cls.get_rule_names()
-		docs = [frappe.get_cached_doc(cls.doctype, name) for name in names]
-		return docs
-
-	@classmethod
-	def get_rule_names(cls):
-		def generator():
-			names = [d.name for d in frappe.get_all(cls.doctype)]
-			return names
-
-		return frappe.cache().get_value(cls.cache_field, generator)
 
 
 def get_fabric_rate(fabric_item_code, price_list, args=None):
@@ -258,6 +303,59 @@ def get_fabric_rate(fabric_item_code, price_list, args=None):
 	if is_customer_provided_item:
 		fabric_rate = 0
 	else:
-		fabric_rate = flt(get_price_list_rate_for(fabric_item_code, price_list, args))
+		signature = (fabric_item_code, price_list, [args.get(f) for f in fabric_price_args])
+		fabric_rate = flt(get_pricing_memo("textile_fabric_rate", signature,
+			lambda: flt(get_price_list_rate_for(fabric_item_code, price_list, args))))
 
 	return fabric_rate
+
+
+def get_pricing_memo(namespace, signature, generator):
+	signature_hash = hashlib.sha1(frappe.as_json(signature).encode()).hexdigest()
+	key = f"{namespace}::{get_pricing_version()}::{signature_hash}"
+
+	value = frappe.cache().get_value(key)
+	if value is None:
+		value = generator()
+		frappe.cache().set_value(key, value, expires_in_sec=pricing_memo_expiry)
+
+	# Callers may update the returned value
+	return copy.deepcopy(value)
+
+
+def get_pricing_version():
+	return frappe.cache().get_value(pricing_version_key, lambda: frappe.generate_hash(length=10))
+
+
+def bump_pricing_version(doc=None, method=None):
+	# Bumped again after commit so that rates memoized by another process from the old rows are not kept,
+	# and after rollback so that rates memoized in this transaction from the uncommitted rows are not kept
+	delete_pricing_version()
+	frappe.db.after_commit.add(delete_pricing_version)
+	frappe.db.after_rollback.add(delete_pricing_version)
+
+
+def delete_pricing_version():
+	# Memoized values of the previous version are never read again and expire on their own
+	frappe.cache().delete_value(pricing_version_key)
+
+
+def on_item_price_change(doc, method=None):
+	item_codes = {doc.item_code}
+
+	doc_before_save = doc.get_doc_before_save()
+	if doc_before_save:
+		item_codes.add(doc_before_save.item_code)
+
+	if any(frappe.get_cached_value("Item", item_code, "textile_item_type") in fabric_item_types
+			for item_code in item_codes if item_code):
+		bump_pricing_version()
+
+
+def clear_textile_pricing_rule_cache(doc=None, method=None):
+	from textile.fabric_printing.doctype.print_pricing_rule.print_pricing_rule import PrintPricingRule
+	from textile.fabric_pretreatment.doctype.pretreatment_pricing_rule.pretreatment_pricing_rule import PretreatmentPricingRule
+
+	# Customer Group bounds are compiled in the rule index
+	for rule_class in (PrintPricingRule, PretreatmentPricingRule):
+		rule_class.clear_pricing_rule_cache()
@@ -0,0 +1,549 @@
+import frappe
+from frappe.utils import cint, flt, cstr
+from frappe.utils import now, get_files_path
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import struct
+import re
+import os
+import tarfile
+import zipfile
+
+
+hash_chunk_size = 1024 * 1024
+
+design_image_extensions = (".jpg", ".jpeg", ".png", ".tif", ".tiff", ".psd", ".psb")
+
+design_image_cache_fields = ["file_url", "file_size", "file_mtime", "width", "height", "dpi", "image_format", "content_hash"]
+
+
+def get_design_image_info_map(file_docs):
+	# Returns {file_url: image info or None if file is missing}
+	file_docs = {d.file_url: d for d in file_docs}
+	if not file_docs:
+		return {}
+
+	cache_name_map = {get_design_image_cache_name(file_url): file_url for file_url in file_docs}
+	cached_map = {}
+	for d in frappe.get_all("Design Image Cache", filters={"name": ["in", list(cache_name_map)]},
+			fields=["name"] + design_image_cache_fields):
+		cached_map[cache_name_map[d.name]] = d
+
+	# Only file system access happens in worker threads, database is accessed in the main thread
+	with ThreadPoolExecutor(max_workers=get_probe_workers(len(file_docs))) as executor:
+		futures = {}
+		for file_url, file_doc in file_docs.items():
+			futures[file_url] = executor.submit(stat_and_probe_image, file_doc.get_full_path(), cached_map.get(file_url))
+
+	out = {}
+	for file_url, future in futures.items():
+		try:
+			file_stat, image_info = future.result()
+		except FileNotFoundError:
+			out[file_url] = None
+			continue
+
+		if image_info:
+			out[file_url] = update_design_image_cache(file_docs[file_url], file_stat, image_info)
+		else:
+			out[file_url] = cached_map[file_url]
+
+	return out
+
+
+def on_file_insert(doc, method=None):
+	from textile.rotated_image import rendition_doctypes, is_image_file
+
+	if doc.attached_to_doctype in rendition_doctypes and is_image_file(doc.file_url):
+		enqueue_file_design_hash(doc.name)
+
+
+def enqueue_file_design_hash(file_name):
+	frappe.enqueue(
+		"textile.design_image.update_file_design_hash",
+		file_name=file_name,
+		queue="long",
+		timeout=1500,
+		job_id=f"design_hash::{file_name}",
+		deduplicate=True,
+		enqueue_after_commit=True,
+	)
+
+
+def update_file_design_hash(file_name):
+	file_url = frappe.db.get_value("File", file_name, "file_url")
+	if file_url:
+		get_design_hash_map([file_url])
+
+
+def get_design_hash_map(image_urls, hash_missing=True):
+	# Returns {file_url: sha256 of file content}, files not hashed yet are hashed or else queued for hashing
+	image_urls = set(url for url in image_urls if url)
+	if not image_urls:
+		return {}
+
+	files = frappe.get_all("File", filters={"file_url": ["in", list(image_urls)]},
+		fields=["name", "file_name", "file_url", "is_private", "design_hash"])
+	files = [d for d in files if d.file_url in image_urls]
+
+	out = {}
+	for d in files:
+		if d.design_hash:
+			out.setdefault(d.file_url, d.design_hash)
+
+	if not hash_missing:
+		for d in files:
+			if d.file_url not in out:
+				enqueue_file_design_hash(d.name)
+
+		return out
+
+	to_hash = {}
+	for d in files:
+		if d.file_url not in out and d.file_url not in to_hash:
+			to_hash[d.file_url] = frappe.get_doc(dict(doctype="File", **d)).get_full_path()
+
+	if to_hash:
+		with ThreadPoolExecutor(max_workers=get_probe_workers(len(to_hash))) as executor:
+			futures = {file_url: executor.submit(get_file_content_hash, file_path) for file_url, file_path in to_hash.items()}
+
+		for file_url, future in futures.items():
+			try:
+				out[file_url] = future.result()
+			except FileNotFoundError:
+				pass
+
+	for d in files:
+		if not d.design_hash and out.get(d.file_url):
+			frappe.db.set_value("File", d.name, "design_hash", out[d.file_url], update_modified=False)
+
+	return out
+
+
+def extract_design_archive(fileobj, attached_to_doctype, attached_to_name, is_private=1, progress_callback=None):
+	# Extracts design images member by member and bulk inserts File records, returns new File names
+	files_path = get_files_path(is_private=is_private)
+	max_file_size = cint(frappe.conf.get("max_file_size"))
+
+	existing_hashes = set(frappe.get_all("File", filters={
+		"attached_to_doctype": attached_to_doctype,
+		"attached_to_name": attached_to_name,
+		"design_hash": ["is", "set"],
+	}, pluck="design_hash"))
+
+	file_fields = ["name", "file_name", "file_url", "is_private", "file_size", "content_hash", "design_hash",
+		"rendition_status", "folder", "attached_to_doctype", "attached_to_name",
+		"owner", "modified_by", "creation", "modified"]
+	if frappe.get_meta("File").has_field("original_file_name"):
+		file_fields.append("original_file_name")
+
+	file_values = []
+	written_paths = []
+
+	# Extracted files are removed if extraction or anything after it in the same transaction fails
+	frappe.db.after_rollback.add(lambda: remove_archive_files(written_paths))
+
+	try:
+		count = total = 0
+		for count, total, member_name, member_size, member_file in iter_archive_members(fileobj):
+			original_file_name = os.path.basename(member_name.replace("\\", "/"))
+
+			if progress_callback:
+				progress_callback(count, total, original_file_name)
+
+			if not is_design_archive_member(member_name):
+				continue
+			if max_file_size and member_size > max_file_size:
+				frappe.msgprint(frappe._("Skipped {0} as it is larger than the maximum file size").format(original_file_name),
+					indicator="orange")
+				continue
+
+			temp_path, file_size, content_hash, design_hash = write_archive_member(member_file, files_path)
+			if not temp_path:
+				continue
+
+			if design_hash in existing_hashes:
+				os.remove(temp_path)
+				continue
+			existing_hashes.add(design_hash)
+
+			file_name = get_archive_member_file_name(original_file_name, design_hash, files_path)
+			file_path = os.path.join(files_path, file_name)
+			os.replace(temp_path, file_path)
+			written_paths.append(file_path)
+
+			timestamp = now()
+			file_values.append(frappe._dict({
+				"name": frappe.generate_hash(length=10),
+				"file_name": file_name,
+				"original_file_name": original_file_name,
+				"file_url": "{0}/files/{1}".format("/private" if is_private else "", file_name),
+				"is_private": cint(is_private),
+				"file_size": file_size,
+				"content_hash": content_hash,
+				"design_hash": design_hash,
+				"rendition_status": "Queued",
+				"folder": "Home/Attachments",
+				"attached_to_doctype": attached_to_doctype,
+				"attached_to_name": attached_to_name,
+				"owner": frappe.session.user,
+				"modified_by": frappe.session.user,
+				"creation": timestamp,
+				"modified": timestamp,
+			}))
+
+		# Archives without a member count are only complete at the end of iteration
+		if progress_callback and count and not total:
+			progress_callback(count, count, None)
+
+		if file_values:
+			frappe.db.bulk_insert("File", file_fields, [[d.get(f) for f in file_fields] for d in file_values])
+	except Exception:
+		remove_archive_files(written_paths)
+		raise
+
+	return [d.name for d in file_values]
+
+
+def remove_archive_files(file_paths):
+	for file_path in file_paths:
+		if os.path.exists(file_path):
+			os.remove(file_path)
+
+
+def iter_archive_members(fileobj):
+	# Yields (count, total, member name, size, file object) without reading the whole archive in memory
+	if zipfile.is_zipfile(fileobj):
+		fileobj.seek(0)
+		with zipfile.ZipFile(fileobj) as archive:
+			members = [m for m in archive.infolist() if not m.is_dir()]
+			for i, member in enumerate(members):
+				with archive.open(member) as member_file:
+					yield i + 1, len(members), member.filename, member.file_size, member_file
+	else:
+		fileobj.seek(0)
+		try:
+			with tarfile.open(fileobj=fileobj, mode="r|*") as archive:
+				for i, member in enumerate(archive):
+					if member.isfile():
+						yield i + 1, None, member.name, member.size, archive.extractfile(member)
+		except tarfile.ReadError:
+			frappe.throw(frappe._("Uploaded file is not a valid ZIP or TAR archive"))
+
+
+def is_design_archive_member(member_name):
+	member_name = member_name.replace("\\", "/")
+	file_name = os.path.basename(member_name)
+
+	if not file_name or file_name.startswith(".") or "__MACOSX/" in member_name:
+		return False
+
+	return file_name.lower().endswith(design_image_extensions)
+
+
+def write_archive_member(member_file, files_path):
+	# Returns the temporary file path with the hashes of its content, the caller moves or removes it
+	md5 = hashlib.md5()
+	sha256 = hashlib.sha256()
+	file_size = 0
+
+	temp_path = os.path.join(files_path, ".{0}.part".format(frappe.generate_hash(length=10)))
+	try:
+		with open(temp_path, "wb") as f:
+			for chunk in iter(lambda: member_file.read(hash_chunk_size), b""):
+				md5.update(chunk)
+				sha256.update(chunk)
+				f.write(chunk)
+				file_size += len(chunk)
+	except Exception:
+		if os.path.exists(temp_path):
+			os.remove(temp_path)
+		raise
+
+	if not file_size:
+		os.remove(temp_path)
+		return None, 0, None, None
+
+	return temp_path, file_size, md5.hexdigest(), sha256.hexdigest()
+
+
+def get_archive_member_file_name(original_file_name, design_hash, files_path):
+	file_name = re.sub(r"[?#%]", "_", original_file_name)
+	if not os.path.exists(os.path.join(files_path, file_name)):
+		return file_name
+
+	stem, ext = os.path.splitext(file_name)
+	return f"{stem}-{design_hash[:8]}{ext}"
+
+
+def get_file_content_hash(file_path):
+	sha256 = hashlib.sha256()
+	with open(file_path, "rb") as f:
+		for chunk in iter(lambda: f.read(hash_chunk_size), b""):
+			sha256.update(chunk)
+
+	return sha256.hexdigest()
+
+
+def get_probe_workers(file_count):
+	max_workers = cint(frappe.conf.get("design_image_probe_workers")) or 8
+	return max(1, min(file_count, max_workers))
+
+
+def stat_and_probe_image(file_path, cached=None):
+	file_stat = os.stat(file_path)
+	if is_cache_valid(cached, file_stat):
+		return file_stat, None
+
+	return file_stat, probe_image(file_path)
+
+
+def is_cache_valid(cached, file_stat):
+	return bool(
+		cached
+		and cint(cached.width)
+		and cint(cached.height)
+		and cint(cached.file_size) == file_stat.st_size
+		and flt(cached.file_mtime, 6) == flt(file_stat.st_mtime, 6)
+	)
+
+
+def update_design_image_cache(file_doc, file_stat, image_info):
+	values = frappe._dict({
+		"file_url": file_doc.file_url,
+		"file_size": file_stat.st_size,
+		"file_mtime": flt(file_stat.st_mtime, 6),
+		"width": cint(image_info.width),
+		"height": cint(image_info.height),
+		"dpi": flt(image_info.dpi),
+		"image_format": image_info.image_format,
+		"content_hash": file_doc.get("content_hash"),
+	})
+
+	cache_name = get_design_image_cache_name(file_doc.file_url)
+	if frappe.db.exists("Design Image Cache", cache_name):
+		frappe.db.set_value("Design Image Cache", cache_name, values)
+	else:
+		cache_doc = frappe.new_doc("Design Image Cache")
+		cache_doc.update(values)
+		cache_doc.name = cache_name
+		try:
+			cache_doc.db_insert()
+		except frappe.DuplicateEntryError:
+			# Probed concurrently by another worker
+			pass
+
+	return values
+
+
+def get_design_image_cache_name(file_url):
+	return hashlib.sha1(cstr(file_url).encode()).hexdigest()
+
+
+def clear_design_image_cache(doc, method=None):
+	if not doc.file_url:
+		return
+
+	other_files = frappe.db.exists("File", {"file_url": doc.file_url, "name": ["!=", doc.name]})
+	if not other_files:
+		frappe.db.delete("Design Image Cache", get_design_image_cache_name(doc.file_url))
+
+
+def probe_image(file_path):
+	with open(file_path, "rb") as f:
+		image_info = probe_image_header(f)
+
+	if not image_info:
+		image_info = probe_image_with_pil(file_path)
+
+	return image_info
+
+
+def probe_image_with_pil(file_path):
+	from PIL import Image
+
+	# Image.open is lazy and only parses the header, pixel data is not decoded
+	with Image.open(file_path) as im:
+		dpi = im.info.get("dpi")
+		return frappe._dict({
+			"width": im.size[0],
+			"height": im.size[1],
+			"dpi": flt(dpi[0]) if dpi else None,
+			"image_format": im.format,
+		})
+
+
+def probe_image_header(f):
+	signature = f.read(8)
+	f.seek(0)
+
+	if signature.startswith(b"\x89PNG\r\n\x1a\n"):
+		return probe_png(f)
+	elif signature.startswith(b"\xff\xd8"):
+		return probe_jpeg(f)
+	elif signature[:4] in (b"II*\x00", b"MM\x00*", b"II+\x00", b"MM\x00+"):
+		return probe_tiff(f)
+	elif signature.startswith(b"8BPS"):
+		return probe_psd(f)
+
+
+def probe_png(f):
+	f.seek(8)
+	length, chunk_type = struct.unpack(">I4s", f.read(8))
+	if chunk_type != b"IHDR":
+		return
+
+	width, height = struct.unpack(">II", f.read(8))
+	out = frappe._dict({"width": width, "height": height, "dpi": None, "image_format": "PNG"})
+
+	# Look for pHYs in the ancillary chunks before image data
+	f.seek(8 + 8 + length + 4)
+	while True:
+		chunk_header = f.read(8)
+		if len(chunk_header) < 8:
+			break
+
+		length, chunk_type = struct.unpack(">I4s", chunk_header)
+		if chunk_type in (b"IDAT", b"IEND"):
+			break
+
+		if chunk_type == b"pHYs":
+			ppu_x, ppu_y, unit = struct.unpack(">IIB", f.read(9))
+			if unit == 1:
+				out.dpi = flt(ppu_x * 0.0254, 2)
+			break
+
+		f.seek(length + 4, os.SEEK_CUR)
+
+	return out
+
+
+def probe_jpeg(f):
+	out = frappe._dict({"dpi": None, "image_format": "JPEG"})
+	sof_markers = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+	f.seek(2)
+	while True:
+		byte = f.read(1)
+		if not byte:
+			return
+		if byte != b"\xff":
+			continue
+
+		marker = f.read(1)
+		while marker == b"\xff":
+			marker = f.read(1)
+		if not marker:
+			return
+
+		marker = ord(marker)
+		if marker == 0x01 or 0xD0 <= marker <= 0xD8:
+			continue
+		if marker == 0xD9:
+			return
+
+		length = struct.unpack(">H", f.read(2))[0]
+		segment_start = f.tell()
+
+		if marker == 0xE0:
+			segment = f.read(min(length - 2, 14))
+			if segment[:5] == b"JFIF\x00" and len(segment) >= 12:
+				units, density_x = struct.unpack(">BH", segment[7:10])
+				if units == 1:
+					out.dpi = flt(density_x)
+				elif units == 2:
+					out.dpi = flt(density_x * 2.54, 2)
+
+		elif marker in sof_markers:
+			height, width = struct.unpack(">xHH", f.read(5))
+			out.width = width
+			out.height = height
+			return out
+
+		f.seek(segment_start + length - 2)
+
+
+tiff_type_formats = {
+	3: ("H", 2),
+	4: ("I", 4),
+	5: ("II", 8),
+	16: ("Q", 8),
+}
+
+
+def probe_tiff(f):
+	header = f.read(16)
+	byte_order = "<" if header[:2] == b"II" else ">"
+	is_big_tiff = struct.unpack(byte_order + "H", header[2:4])[0] == 43
+
+	if is_big_tiff:
+		ifd_offset = struct.unpack(byte_order + "Q", header[8:16])[0]
+		count_format, entry_size, value_size = "Q", 20, 8
+	else:
+		ifd_offset = struct.unpack(byte_order + "I", header[4:8])[0]
+		count_format, entry_size, value_size = "H", 12, 4
+
+	f.seek(ifd_offset)
+	count_size = struct.calcsize(count_format)
+	entry_count = struct.unpack(byte_order + count_format, f.read(count_size))[0]
+	entries = f.read(entry_count * entry_size)
+
+	tags = {}
+	for i in range(entry_count):
+		entry = entries[i * entry_size:(i + 1) * entry_size]
+		tag, value_type = struct.unpack(byte_order + "HH", entry[:4])
+		if tag not in (256, 257, 282, 296) or value_type not in tiff_type_formats:
+			continue
+
+		value_format, type_size = tiff_type_formats[value_type]
+		value_field = entry[entry_size - value_size:]
+
+		if type_size <= value_size:
+			value_bytes = value_field[:type_size]
+		else:
+			pointer_format = "Q" if is_big_tiff else "I"
+			position = f.tell()
+			f.seek(struct.unpack(byte_order + pointer_format, value_field)[0])
+			value_bytes = f.read(type_size)
+			f.seek(position)
+
+			if len(value_bytes) < type_size:
+				continue
+
+		tags[tag] = struct.unpack(byte_order + value_format, value_bytes)
+
+	if 256 not in tags or 257 not in tags:
+		return
+
+	out = frappe._dict({
+		"width": tags[256][0],
+		"height": tags[257][0],
+		"dpi": None,
+		"image_format": "TIFF",
+	})
+
+	if 282 in tags and tags[282][1]:
+		resolution = tags[282][0] / tags[282][1]
+		resolution_unit = tags.get(296, (2,))[0]
+		if resolution_unit == 2:
+			out.dpi = flt(resolution, 2)
+		elif resolution_unit == 3:
+			out.dpi = flt(resolution * 2.54, 2)
+
+	return out
+
+
+def probe_psd(f):
+	header = f.read(26)
+	if len(header) < 26:
+		return
+
+	version = struct.unpack(">H", header[4:6])[0]
+	height, width = struct.unpack(">II", header[14:22])
+
+	return frappe._dict({
+		"width": width,
+		"height": height,
+		"dpi": None,
+		"image_format": "PSB" if version == 2 else "PSD",
+	})
@@ -4,14 +4,19 @@
 import frappe
 from frappe import _
 from textile.controllers.textile_order import TextileOrder
+from textile.controllers.order_status_updater import queue_order_status_update, skip_order_status_updates
 from frappe.utils import cint, flt, round_up
 from textile.utils import pretreatment_components, get_textile_conversion_factors, validate_textile_item
+from textile.overrides.item_details_hooks import batch_price_list_rates
 from frappe.model.mapper import get_mapped_doc
 from frappe.desk.notifications import clear_doctype_notifications
-from erpnext.manufacturing.doctype.work_order.work_order import _create_work_orders, get_subcontractable_qty
+from erpnext.manufacturing.doctype.work_order.work_order import get_subcontractable_qty
 from textile.fabric_pretreatment.doctype.pretreatment_process_rule.pretreatment_process_rule import get_pretreatment_process_values
 from frappe.desk.reportview import get_match_cond, get_filters_cond
 from erpnext.controllers.queries import get_fields
+from textile.textile.doctype.textile_order_progress.textile_order_progress import (
+	get_order_progress, update_order_progress, delete_order_progress
+)
 
 
 force_customer_fields = ["customer_name"]
@@ -25,6 +30,8 @@ force_fields = force_customer_fields + force_fabric_fields + force_process_compo
 
 
 class PretreatmentOrder(TextileOrder):
+	row_scoped_methods = ["set_sales_order_status", "set_production_packing_status", "set_delivery_status"]
+
 	@property
 	def greige_fabric_stock_qty(self):
 		return self.get_fabric_stock_qty(self.greige_fabric_item, self.fabric_warehouse)
@@ -82,6 +89,9 @@ class PretreatmentOrder(TextileOrder):
 
 		self.update_status_on_cancel()
 
+	def on_trash(self):
+		delete_order_progress(self.doctype, self.name)
+
 	def set_work_order_onload(self):
 		work_order = frappe.db.get_value("Work Order",
 			filters={"pretreatment_order": self.name, "docstatus": ["<", 2]},
@@ -90,6 +100,15 @@ class PretreatmentOrder(TextileOrder):
 		self.set_onload("work_order", work_order)
 
 	def set_progress_data_onload(self):
+		# Progress is maintained when Work Orders change, orders without stored progress are aggregated
+		progress_data = get_order_progress(self.doctype, self.name) or self.get_progress_data()
+		self.set_onload("progress_data", progress_data)
+
+	def update_order_progress(self, update=False, update_modified=True):
+		if update and self.docstatus == 1:
+			update_order_progress(self.doctype, self.name, self.get_progress_data())
+
+	def get_progress_data(self):
 		totals = frappe.db.sql("""
 			select
 				sum(qty) as qty,
@@ -128,7 +147,7 @@ class PretreatmentOrder(TextileOrder):
 		for row in operations_data:
 			progress_data["operations"].append(row)
 
-		self.set_onload("progress_data", progress_data)
+		return progress_data
 
 	def get_disallow_on_submit_fields(self):
 		if self.cant_change_delivery_required():
@@ -240,41 +259,33 @@ class PretreatmentOrder(TextileOrder):
 			ready_fabric_doc.save(ignore_permissions=True)
 
 	def start_pretreatment_order(self):
-		frappe.flags.skip_pretreatment_order_status_update = True
+		# Order status is updated once at the end
+		with skip_order_status_updates(self.doctype, self.name):
+			# Ready Fabric BOM
+			if not self.ready_fabric_bom:
+				self.create_ready_fabric_bom(ignore_permissions=True, ignore_version=True, ignore_feed=True)
+
+			# Sales Order
+			if flt(self.per_ordered) < 100 and not self.is_internal_customer:
+				sales_order = _make_sales_order(self.name, ignore_permissions=True)
+				sales_order.flags.ignore_version = True
+				sales_order.flags.ignore_feed = True
+				sales_order.save()
+				sales_order.submit()
+
+				sales_order_msg = _("Sales Order created: {0}").format(
+					frappe.utils.get_link_to_form("Sales Order", sales_order.name)
+				)
+				frappe.msgprint(sales_order_msg)
 
-		# Ready Fabric BOM
-		if not self.ready_fabric_bom:
-			self.create_ready_fabric_bom(ignore_permissions=True, ignore_version=True, ignore_feed=True)
-
-		# Sales Order
-		if flt(self.per_ordered) < 100 and not self.is_internal_customer:
-			sales_order = _make_sales_order(self.name, ignore_permissions=True)
-			sales_order.flags.ignore_version = True
-			sales_order.flags.ignore_feed = True
-			sales_order.save()
-			sales_order.submit()
-
-			sales_order_msg = _("Sales Order created: {0}").format(
-				frappe.utils.get_link_to_form("Sales Order", sales_order.name)
-			)
-			frappe.msgprint(sales_order_msg)
-
-		# Work Order
-		if flt(self.per_work_ordered) < 100:
-			self.create_work_order(ignore_permissions=True, ignore_version=True, ignore_feed=True)
+			# Work Order
+			if flt(self.per_work_ordered) < 100:
+				self.create_work_order(ignore_permissions=True, ignore_version=True, ignore_feed=True)
 
 		# Status Update
-		frappe.flags.skip_pretreatment_order_status_update = False
-
-		self.set_sales_order_status(update=True)
-		self.set_production_packing_status(update=True)
-		self.set_delivery_status(update=True)
-		self.set_status(update=True)
-
-		self.validate_ordered_qty()
-		self.validate_work_order_qty()
-
-		self.notify_update()
+		queue_order_status_update(self.doctype, self.name,
+			["set_sales_order_status", "set_production_packing_status", "set_delivery_status"],
+			validate_methods=["validate_ordered_qty", "validate_work_order_qty"])
 
 	def create_ready_fabric_bom(self, ignore_permissions=False, ignore_version=True, ignore_feed=True):
 		bom_doc = self.make_ready_fabric_bom()
@@ -425,7 +436,7 @@ class PretreatmentOrder(TextileOrder):
 			"cost_center": self.get("cost_center"),
 		}
 
-		return _create_work_orders([work_order_item], self.company,
+		return self.make_pretreatment_order_work_orders([work_order_item],
 			ignore_permissions=ignore_permissions, ignore_version=ignore_version, ignore_feed=ignore_feed)
 
 	def create_work_order_against_sales_order(self, ignore_permissions=False, ignore_version=True, ignore_feed=True):
@@ -440,26 +451,41 @@ class PretreatmentOrder(TextileOrder):
 		wo_items = []
 		for so in sales_orders:
 			so_doc = frappe.get_doc('Sales Order', so)
-			wo_items += so_doc.get_work_order_items(item_condition=lambda d: d.pretreatment_order == self.name)
+			for d in so_doc.get_work_order_items(item_condition=lambda d: d.pretreatment_order == self.name):
+				d["pretreatment_order"] = self.name
+				wo_items.append(d)
 
-		wo_list = []
-		for i, d in enumerate(wo_items):
-			wo_list += _create_work_orders([d], self.company,
-				ignore_permissions=ignore_permissions, ignore_version=ignore_version, ignore_feed=ignore_feed)
+		wo_list = self.make_pretreatment_order_work_orders(wo_items,
+			ignore_permissions=ignore_permissions, ignore_version=ignore_version, ignore_feed=ignore_feed)
 
 		if not wo_list:
 			frappe.msgprint(_("Work Order already created"))
 
 		return wo_list
 
-	def set_sales_order_status(self, update=False, update_modified=True):
-		sales_order_data = frappe.db.sql("""
-			select sum(stock_qty)
-			from `tabSales Order Item`
-			where docstatus = 1 and pretreatment_order = %s
-		""", self.name)
+	def make_pretreatment_order_work_orders(self, wo_items, ignore_permissions=False, ignore_version=True, ignore_feed=True):
+		from textile.overrides.work_order_hooks import get_pretreatment_order_details
 
-		self.ordered_qty = flt(sales_order_data[0][0]) if sales_order_data else 0
+		get_pretreatment_order_details(self.name, order_doc=self)
+
+		return self.make_work_orders(wo_items,
+			ignore_permissions=ignore_permissions, ignore_version=ignore_version, ignore_feed=ignore_feed)
+
+	def use_stored_qty(self, row_names=None):
+		# Quantities maintained by submission and cancellation are aggregated again only if the order itself is affected
+		return row_names is not None and self.name not in row_names
+
+	def set_sales_order_status(self, update=False, update_modified=True, row_names=None):
+		if self.use_stored_qty(row_names):
+			self.ordered_qty = flt(self.ordered_qty)
+		else:
+			sales_order_data = frappe.db.sql("""
+				select sum(stock_qty)
+				from `tabSales Order Item`
+				where docstatus = 1 and pretreatment_order = %s
+			""", self.name)
+
+			self.ordered_qty = flt(sales_order_data[0][0]) if sales_order_data else 0
 
 		ordered_qty = flt(self.ordered_qty, self.precision("qty"))
 		stock_qty = flt(self.stock_qty, self.precision("qty"))
@@ -475,8 +501,8 @@ class PretreatmentOrder(TextileOrder):
 		self.validate_completed_qty_for_row(self, 'ordered_qty', 'stock_qty',
 			from_doctype=from_doctype, item_field="ready_fabric_item")
 
-	def set_production_packing_status(self, update=False, update_modified=True):
-		data = self.get_production_packing_data()
+	def set_production_packing_status(self, update=False, update_modified=True, row_names=None):
+		data = self.get_production_packing_data(use_stored_qty=self.use_stored_qty(row_names))
 
 		self.work_order_qty = data.work_order_qty
 		self.produced_qty = data.completed_qty
@@ -517,7 +543,7 @@ class PretreatmentOrder(TextileOrder):
 				'packing_status': self.packing_status,
 			}, update_modified=update_modified)
 
-	def get_production_packing_data(self):
+	def get_production_packing_data(self, use_stored_qty=False):
 		out = frappe._dict()
 		out.work_order_qty = 0
 		out.producible_qty = 0
@@ -530,7 +556,28 @@ class PretreatmentOrder(TextileOrder):
 		out.has_work_order_to_pack = False
 		out.has_work_order_to_produce = False
 
-		if self.docstatus == 1:
+		if self.docstatus == 1 and use_stored_qty:
+			out.work_order_qty = flt(self.work_order_qty)
+			out.completed_qty = flt(self.produced_qty)
+			out.packed_qty = flt(self.packed_qty)
+			out.subcontractable_qty = flt(self.subcontractable_qty)
+
+			out.has_work_order_to_produce = bool(frappe.db.sql("""
+				SELECT EXISTS(
+					SELECT 1 FROM `tabWork Order`
+					WHERE docstatus = 1 AND pretreatment_order = %s
+						AND (production_status = 'To Produce' OR subcontracting_status = 'To Receive')
+				)
+			""", self.name)[0][0])
+
+			out.has_work_order_to_pack = bool(frappe.db.sql("""
+				SELECT EXISTS(
+					SELECT 1 FROM `tabWork Order`
+					WHERE docstatus = 1 AND pretreatment_order = %s AND packing_status != 'Packed'
+				)
+			""", self.name)[0][0])
+
+		elif self.docstatus == 1:
 			# Work Order
 			work_order_data = frappe.db.sql("""
 				SELECT qty, producible_qty,
@@ -580,8 +627,8 @@ class PretreatmentOrder(TextileOrder):
 		self.validate_completed_qty_for_row(self, 'packed_qty', 'stock_qty',
 			allowance_type="production", from_doctype=from_doctype, item_field="ready_fabric_item")
 
-	def set_delivery_status(self, update=False, update_modified=True):
-		data = self.get_delivered_status_data()
+	def set_delivery_status(self, update=False, update_modified=True, row_names=None):
+		data = self.get_delivered_status_data(use_stored_qty=self.use_stored_qty(row_names))
 		self.delivered_qty = flt(data.delivered_qty)
 
 		stock_qty = flt(self.stock_qty, self.precision("qty"))
@@ -600,19 +647,22 @@ class PretreatmentOrder(TextileOrder):
 				'delivery_status': self.delivery_status,
 			}, update_modified=update_modified)
 
-	def get_delivered_status_data(self):
+	def get_delivered_status_data(self, use_stored_qty=False):
 		out = frappe._dict()
 		out.delivered_qty = 0
 		out.has_incomplete_delivery = False
 
 		if self.docstatus == 1:
-			delivered_data = frappe.db.sql("""
-				SELECT sum(delivered_qty * conversion_factor)
-				FROM `tabSales Order Item`
-				WHERE docstatus = 1 AND pretreatment_order = %s and item_code = %s
-			""", (self.name, self.ready_fabric_item))
-			if delivered_data:
-				out.delivered_qty = flt(delivered_data[0][0])
+			if use_stored_qty:
+				out.delivered_qty = flt(self.delivered_qty)
+			else:
+				delivered_data = frappe.db.sql("""
+					SELECT sum(delivered_qty * conversion_factor)
+					FROM `tabSales Order Item`
+					WHERE docstatus = 1 AND pretreatment_order = %s and item_code = %s
+				""", (self.name, self.ready_fabric_item))
+				if delivered_data:
+					out.delivered_qty = flt(delivered_data[0][0])
 
 			sales_orders_to_deliver = frappe.db.sql_list("""
 				select count(so.name)
@@ -986,7 +1036,8 @@ def _make_sales_order(source_name, target_doc=None, ignore_permissions=False):
 			target.cost_center = source.get("cost_center")
 
 		target.flags.ignore_permissions = ignore_permissions
-		target.run_method("set_missing_values")
+		with batch_price_list_rates():
+			target.run_method("set_missing_values")
 		target.run_method("set_taxes_and_charges")
 		target.run_method("calculate_taxes_and_totals")
 		target.run_method("set_payment_schedule")
@@ -4,7 +4,8 @@
 import frappe
 from frappe import _
 from frappe.model.document import Document
-from textile.utils import validate_textile_item, pretreatment_components
+from frappe.model import no_value_fields
+from textile.utils import get_rule_table, clear_rule_table, validate_textile_item, pretreatment_components
 
 filter_fields = ['fabric_material', 'fabric_type']
 
@@ -20,6 +21,9 @@ class PretreatmentProcessRule(Document):
 	def after_rename(self, old_name, new_name, merge):
 		clear_pretreatment_process_rule_cache()
 
+	def after_delete(self):
+		clear_pretreatment_process_rule_cache()
+
 	def validate_process_items(self):
 		all_empty = True
 
@@ -53,39 +57,6 @@ class PretreatmentProcessRule(Document):
 			frappe.throw(_("{0} already exists with the same filters")
 				.format(frappe.get_desk_link("Pretreatment Process Rule", existing[0].name)))
 
-	def get_applicable_rule_dict(self, filters):
-		required_filters = self.get_required_filters()
-
-		if required_filters:
-			# check if required filters matches
-			required_filters_matched = True
-			for field, required_value in required_filters.items():
-				if filters.get(field) != required_value:
-					required_filters_matched = False
-					break
-		else:
-			# global rule, applicable to all
-			required_filters_matched = True
-
-		if required_filters_matched:
-			return self.get_rule_match_dict(required_filters)
-		else:
-			return None
-
-	def get_required_filters(self):
-		required_filters = frappe._dict()
-		for f in filter_fields:
-			if self.get(f):
-				required_filters[f] = self.get(f)
-
-		return required_filters
-
-	def get_rule_match_dict(self, required_filters):
-		rule_dict = self.as_dict()
-		rule_dict.required_filters = required_filters
-
-		return rule_dict
-
 
 def get_pretreatment_process_values(fabric_item):
 	filters = get_filters_dict(fabric_item)
@@ -157,30 +128,35 @@ def get_applicable_rules_for_filters(filters):
 	if not filters:
 		filters = frappe._dict()
 
-	rules = get_pretreatment_process_rule_docs()
-
 	applicable_rules = []
-	for rule in rules:
-		rule_dict = rule.get_applicable_rule_dict(filters)
-		if rule_dict:
-			applicable_rules.append(rule_dict)
+	for rule in get_pretreatment_process_rule_table():
+		# Rules without required filters are applicable to all
+		if all(filters.get(field) == required_value for field, required_value in rule.required_filters.items()):
+			applicable_rules.append(rule)
 
 	return applicable_rules
 
 
-def get_pretreatment_process_rule_docs():
-	names = get_pretreatment_process_rule_names()
-	docs = [frappe.get_cached_doc("Pretreatment Process Rule", name) for name in names]
-	return docs
+def get_pretreatment_process_rule_table():
+	return get_rule_table("pretreatment_process_rule_table", compile_pretreatment_process_rule_table)
+
 
+def compile_pretreatment_process_rule_table():
+	# Only the filters and set values of each rule are kept
+	value_fields = [
+		df.fieldname for df in frappe.get_meta("Pretreatment Process Rule").fields
+		if df.fieldtype not in no_value_fields and df.fieldname not in filter_fields + ["pretreatment_process_rule_name"]
+	]
 
-def get_pretreatment_process_rule_names():
-	def generator():
-		names = [d.name for d in frappe.get_all('Pretreatment Process Rule')]
-		return names
+	table = []
+	for rule in frappe.get_all("Pretreatment Process Rule", fields=["name"] + filter_fields + value_fields):
+		compiled_rule = frappe._dict({f: rule.get(f) for f in value_fields if rule.get(f)})
+		compiled_rule.name = rule.name
+		compiled_rule.required_filters = frappe._dict({f: rule.get(f) for f in filter_fields if rule.get(f)})
+		table.append(compiled_rule)
 
-	return frappe.cache().get_value("pretreatment_process_rule_names", generator)
+	return table
 
 
 def clear_pretreatment_process_rule_cache():
-	frappe.cache().delete_value('pretreatment_process_rule_names')
+	clear_rule_table("pretreatment_process_rule_table")
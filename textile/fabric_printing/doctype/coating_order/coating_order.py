@@ -130,17 +130,20 @@ class CoatingOrder(TextileOrder):
 		if update:
 			self.db_set('status', self.status, update_modified=update_modified)
 
-	def set_coating_status(self, update=False, update_modified=True):
+	def set_coating_status(self, update=False, update_modified=True, use_stored_qty=False):
 		production_data = None
-		if self.docstatus == 1:
+		if self.docstatus == 1 and not use_stored_qty:
 			production_data = frappe.db.sql("""
 				select sum(fg_completed_qty) as coated_qty, max(posting_date) as actual_end_date
 				from `tabStock Entry`
 				where docstatus = 1 and purpose = 'Manufacture' and coating_order = %s
 			""", self.name, as_dict=1)
 
-		self.coated_qty = flt(production_data[0].coated_qty) if production_data else 0
-		last_stock_entry_date = flt(production_data[0].actual_end_date) if production_data else 0
+		# Coated Qty is maintained by Stock Entry submission and cancellation when using stored values
+		if use_stored_qty:
+			self.coated_qty = flt(self.coated_qty) if self.docstatus == 1 else 0
+		else:
+			self.coated_qty = flt(production_data[0].coated_qty) if production_data else 0
 
 		self.per_coated = flt(self.coated_qty / self.stock_qty * 100 if self.stock_qty else 0, 3)
 
@@ -158,7 +161,17 @@ class CoatingOrder(TextileOrder):
 		else:
 			self.coating_status = "Not Applicable"
 
-		self.actual_end_date = last_stock_entry_date if self.coating_status in ["Coated", "Stopped"] else None
+		if self.coating_status in ["Coated", "Stopped"]:
+			if use_stored_qty:
+				production_data = frappe.db.sql("""
+					select max(posting_date) as actual_end_date
+					from `tabStock Entry`
+					where docstatus = 1 and purpose = 'Manufacture' and coating_order = %s
+				""", self.name, as_dict=1)
+
+			self.actual_end_date = flt(production_data[0].actual_end_date) if production_data else 0
+		else:
+			self.actual_end_date = None
 
 		if update:
 			self.db_set({
@@ -0,0 +1,11 @@
+# Copyright (c) 2026, ParaLogic and contributors
+# For license information, please see license.txt
+
+# import frappe
+from frappe.model.document import Document
+from textile.design_image import get_design_image_cache_name
+
+
+class DesignImageCache(Document):
+	def autoname(self):
+		self.name = get_design_image_cache_name(self.file_url)
@@ -292,6 +292,10 @@ textile.PrintOrder = class PrintOrder extends textile.TextileOrder {
 	setup_buttons() {
 		let doc = this.frm.doc;
 
+		if (doc.docstatus == 0 && !doc.__islocal && this.frm.has_perm("write")) {
+			this.frm.add_custom_button(__("Upload Design Archive"), () => this.upload_design_archive());
+		}
+
 		if (doc.docstatus == 1) {
 			if (doc.per_work_ordered > 0) {
 				this.frm.add_custom_button(__("Work Order List"), () => this.show_work_orders());
@@ -702,6 +706,43 @@ textile.PrintOrder = class PrintOrder extends textile.TextileOrder {
 		});
 	}, 1000);
 
+	upload_design_archive() {
+		this.frm.check_if_unsaved();
+
+		let input = document.createElement("input");
+		input.type = "file";
+		input.accept = ".zip,.tar,.tgz,.gz,.bz2,.xz";
+		input.onchange = () => {
+			let file = input.files[0];
+			if (!file) {
+				return;
+			}
+
+			// Posted directly instead of through upload_file so the archive is streamed to disk
+			let form_data = new FormData();
+			form_data.append("file", file, file.name);
+			form_data.append("docname", this.frm.doc.name);
+
+			frappe.show_alert(__("Uploading {0}...", [file.name]));
+			fetch("/api/method/textile.fabric_printing.doctype.print_order.print_order.upload_design_archive", {
+				method: "POST",
+				headers: {
+					"Accept": "application/json",
+					"X-Frappe-CSRF-Token": frappe.csrf_token,
+				},
+				body: form_data,
+			}).then(r => r.json()).then(r => {
+				if (r._server_messages) {
+					JSON.parse(r._server_messages).map(m => JSON.parse(m)).forEach(m => {
+						m.alert ? frappe.show_alert(m) : frappe.msgprint(m);
+					});
+				}
+				this.frm.reload_doc();
+			});
+		};
+		input.click();
+	}
+
 	update_status(status) {
 		this.frm.check_if_unsaved();
 
@@ -889,6 +930,7 @@ textile.PrintOrder = class PrintOrder extends textile.TextileOrder {
 				this.update_progress(progress_data);
 			}
 		});
+		this.subscribe_progress();
 
 		if (this.frm.doc.docstatus == 1 && this.frm.doc.per_work_ordered) {
 			this.show_progress_for_production();
@@ -897,6 +939,31 @@ textile.PrintOrder = class PrintOrder extends textile.TextileOrder {
 		}
 	}
 
+	subscribe_progress() {
+		// Progress is only published while the server knows that the form is open
+		clearInterval(this.progress_subscription);
+		if (this.frm.is_new()) {
+			return;
+		}
+
+		let subscribe = () => {
+			if (frappe.get_route_str() != `Form/${this.frm.doctype}/${this.frm.doc.name}`) {
+				clearInterval(this.progress_subscription);
+				return;
+			}
+
+			frappe.call({
+				method: "textile.fabric_printing.doctype.print_order.print_order.subscribe_print_order_progress",
+				args: {
+					print_order: this.frm.doc.name,
+				},
+			});
+		};
+
+		subscribe();
+		this.progress_subscription = setInterval(subscribe, 30000);
+	}
+
 	update_progress(progress_data) {
 		if (progress_data) {
 			this.frm.dashboard.show_progress(
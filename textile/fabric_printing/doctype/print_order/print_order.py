@@ -3,14 +3,17 @@
 
 import frappe
 from frappe import _
-from frappe.utils import flt, cint, round_up
+from frappe.utils import flt, cint, cstr, round_up, now
 from frappe.model.mapper import get_mapped_doc
 from frappe.desk.notifications import clear_doctype_notifications
 from textile.fabric_printing.doctype.print_process_rule.print_process_rule import get_print_process_values, get_applicable_papers
 from textile.utils import validate_textile_item, get_textile_conversion_factors, printing_components
 from textile.controllers.textile_order import TextileOrder
-from PIL import Image
+from textile.controllers.order_status_updater import queue_order_status_update, skip_order_status_updates, status_update_methods
+from textile.design_image import get_design_image_info_map, get_design_hash_map
+from textile.overrides.item_details_hooks import batch_price_list_rates
 import json
+import time
 
 
 default_fields_map = {
@@ -34,8 +37,35 @@ force_process_component_fields = (
 
 force_fields = force_customer_fields + force_fabric_fields + force_process_fields + force_process_component_fields
 
+start_journal_chunk_size = 50
+
+# Fields set per copy when design items and BOMs are copied from a validated template
+design_item_fields = (
+	"item_code", "item_name", "description", "image",
+	"design_width", "design_height", "design_gap", "per_wastage", "design_notes",
+)
+design_bom_item_fields = ("item", "item_name", "description", "image", "uom")
+
+# Steps of a Print Order start split into parallel jobs
+print_order_start_steps = ["Design Items", "Fabric Transfer and Sales Order", "Work Orders", "Status Update"]
+sharded_start_step_titles = {
+	"Design Items": "Creating Design Items and BOMs",
+	"Work Orders": "Creating Work Orders",
+}
+
+# Last published progress per site, Print Order and title, used to throttle realtime updates
+progress_publish_state = {}
+progress_publish_state_ttl = 600
+progress_listener_ttl = 60
+progress_listener_check_interval = 5
+
 
 class PrintOrder(TextileOrder):
+	row_scoped_methods = [
+		"set_sales_order_status", "set_production_packing_status", "set_delivery_status",
+		"validate_ordered_qty", "validate_work_order_qty", "validate_packed_qty", "validate_delivered_qty",
+	]
+
 	@property
 	def fabric_stock_qty(self):
 		return self.get_fabric_stock_qty(self.fabric_item, self.fabric_warehouse)
@@ -46,12 +76,12 @@ class PrintOrder(TextileOrder):
 
 	def onload(self):
 		if self.docstatus == 0:
-			self.set_missing_values()
+			self.set_missing_values(only_new_attachments=True)
 			self.calculate_totals()
 
 	@frappe.whitelist()
 	def on_upload_complete(self):
-		self.set_missing_values()
+		self.set_missing_values(only_new_attachments=True)
 		self.calculate_totals()
 
 	def validate(self):
@@ -69,6 +99,7 @@ class PrintOrder(TextileOrder):
 		self.calculate_totals()
 
 		if self.docstatus == 1:
+			self.set_design_hashes()
 			self.set_existing_items_and_boms()
 
 		self.set_item_creation_status()
@@ -92,9 +123,9 @@ class PrintOrder(TextileOrder):
 
 		self.update_status_on_cancel()
 
-	def set_missing_values(self, get_default_process=False):
+	def set_missing_values(self, get_default_process=False, only_new_attachments=False):
 		self.set_default_cost_center()
-		self.attach_unlinked_item_images()
+		self.attach_unlinked_item_images(only_new_attachments=only_new_attachments)
 		self.set_design_details_from_image()
 		self.set_fabric_item_details(get_default_process=get_default_process)
 		self.set_process_item_details()
@@ -105,16 +136,23 @@ class PrintOrder(TextileOrder):
 			self.cost_center = frappe.db.get_single_value("Fabric Printing Settings",
 			"default_printing_cost_center")
 
-	def attach_unlinked_item_images(self):
+	def attach_unlinked_item_images(self, only_new_attachments=False):
 		filters = {
 			'attached_to_doctype': self.doctype,
 			'attached_to_name': self.name
 		}
-		files_urls = frappe.db.get_all('File', filters, ['file_url'], order_by="creation", pluck="file_url")
+
+		# Only look at files uploaded since the last sync
+		if only_new_attachments and self.get("attachments_synced_upto"):
+			filters['creation'] = ['>=', self.attachments_synced_upto]
+
+		files = frappe.db.get_all('File', filters, ['file_url', 'creation'], order_by="creation")
+		if files:
+			self.attachments_synced_upto = files[-1].creation
 
 		linked_images = {d.design_image for d in self.items}
 
-		for file_url in files_urls:
+		for file_url in [d.file_url for d in files]:
 			if file_url in linked_images:
 				continue
 
@@ -129,14 +167,13 @@ class PrintOrder(TextileOrder):
 			self.append('items', row)
 
 	def set_design_details_from_image(self):
-		for d in self.items:
-			if not d.design_image:
-				continue
-			if d.design_width and d.design_height:
-				continue
+		rows = [d for d in self.items if d.design_image and not (d.design_width and d.design_height)]
+		if not rows:
+			return
 
-			design_details = get_image_details(d.design_image, throw_not_found=self.docstatus == 1)
-			d.update(design_details)
+		image_details_map = get_image_details_map([d.design_image for d in rows], throw_not_found=self.docstatus == 1)
+		for d in rows:
+			d.update(image_details_map[d.design_image])
 
 	def set_fabric_item_details(self, get_default_process=False):
 		details = get_fabric_item_details(self.fabric_item, get_default_process=get_default_process)
@@ -391,6 +428,12 @@ class PrintOrder(TextileOrder):
 		self.total_fabric_length = flt(self.total_fabric_length, self.precision("total_fabric_length"))
 		self.total_panel_qty = flt(self.total_panel_qty, self.precision("total_panel_qty"))
 
+	def set_design_hashes(self):
+		# Files not hashed yet are hashed in the background, their rows are matched by design image until then
+		design_hash_map = get_design_hash_map([d.design_image for d in self.items], hash_missing=False)
+		for d in self.items:
+			d.design_hash = design_hash_map.get(d.design_image)
+
 	def set_existing_items_and_boms(self):
 		for d in self.items:
 			d.item_code = self.get_existing_design_item(d)
@@ -403,25 +446,35 @@ class PrintOrder(TextileOrder):
 			"customer": self.customer,
 			"fabric_item": self.fabric_item,
 			"design_image": row.design_image,
+			"design_hash": row.design_hash,
 			"design_width": row.design_width,
 			"design_height": row.design_height,
 		})
 
-		existing_design_item = frappe.db.sql_list("""
-			SELECT i.item_code
-			FROM `tabPrint Order Item` i
-			INNER JOIN `tabPrint Order` p ON p.name = i.parent
-			WHERE p.name != %(name)s AND ifnull(i.item_code, '') != ''
-				AND p.customer = %(customer)s
-				AND p.fabric_item = %(fabric_item)s
-				AND i.design_image = %(design_image)s
-				AND i.design_width = %(design_width)s
-				AND i.design_height = %(design_height)s
-			ORDER BY p.creation DESC
-			LIMIT 1
-		""", filters)
-
-		return existing_design_item[0] if existing_design_item else None
+		# Same content uploaded under a different file name is the same design
+		design_conditions = ["i.design_image = %(design_image)s"]
+		if row.design_hash:
+			design_conditions.insert(0, "i.design_hash = %(design_hash)s")
+
+		for design_condition in design_conditions:
+			existing_design_item = frappe.db.sql_list("""
+				SELECT i.item_code
+				FROM `tabPrint Order Item` i
+				INNER JOIN `tabPrint Order` p ON p.name = i.parent
+				WHERE p.name != %(name)s AND ifnull(i.item_code, '') != ''
+					AND p.customer = %(customer)s
+					AND p.fabric_item = %(fabric_item)s
+					AND {0}
+					AND i.design_width = %(design_width)s
+					AND i.design_height = %(design_height)s
+				ORDER BY p.creation DESC
+				LIMIT 1
+			""".format(design_condition), filters)
+
+			if existing_design_item:
+				return existing_design_item[0]
+
+		return None
 
 	def get_existing_design_bom(self, item_code):
 		if not item_code:
@@ -472,7 +525,8 @@ class PrintOrder(TextileOrder):
 
 		return existing_bom[0] if existing_bom else None
 
-	def create_work_orders(self, publish_progress=True, ignore_permissions=False, ignore_version=True, ignore_feed=True):
+	def create_work_orders(self, publish_progress=True, ignore_permissions=False, ignore_version=True, ignore_feed=True,
+			start_journal=None, commit=False, row_names=None):
 		if self.docstatus != 1:
 			frappe.throw(_("Print Order is not submitted"))
 
@@ -481,10 +535,12 @@ class PrintOrder(TextileOrder):
 
 		if self.is_internal_customer:
 			wo_list = self.create_work_orders_against_print_order(publish_progress=publish_progress,
-				ignore_permissions=ignore_permissions, ignore_version=ignore_version, ignore_feed=ignore_feed)
+				ignore_permissions=ignore_permissions, ignore_version=ignore_version, ignore_feed=ignore_feed,
+				start_journal=start_journal, commit=commit, row_names=row_names)
 		else:
 			wo_list = self.create_work_order_against_sales_order(publish_progress=publish_progress,
-				ignore_permissions=ignore_permissions, ignore_version=ignore_version, ignore_feed=ignore_feed)
+				ignore_permissions=ignore_permissions, ignore_version=ignore_version, ignore_feed=ignore_feed,
+				start_journal=start_journal, commit=commit, row_names=row_names)
 
 		if wo_list:
 			wo_message = _("Work Orders created: {0}").format(
@@ -497,19 +553,24 @@ class PrintOrder(TextileOrder):
 		ignore_permissions=False,
 		ignore_version=True,
 		ignore_feed=True,
+		start_journal=None,
+		commit=False,
+		row_names=None,
 	):
-		from erpnext.manufacturing.doctype.work_order.work_order import _create_work_orders
+		completed_rows = set(start_journal.get("work_orders") or []) if start_journal else set()
 
-		wo_list = []
+		wo_items = []
+		for d in self.items:
+			if row_names and d.name not in row_names:
+				continue
 
-		for i, d in enumerate(self.items):
 			pending_qty = flt(d.stock_print_length) - flt(d.work_order_qty)
 			pending_qty = round_up(pending_qty, frappe.get_precision("Work Order", "qty"))
 
-			if pending_qty <= 0:
+			if pending_qty <= 0 or d.name in completed_rows:
 				continue
 
-			work_order_item = {
+			wo_items.append({
 				"print_order": self.name,
 				"print_order_item": d.name,
 				"item_code": d.item_code,
@@ -520,13 +581,12 @@ class PrintOrder(TextileOrder):
 				"customer": self.customer,
 				"customer_name": self.customer_name,
 				"cost_center": self.get("cost_center"),
-			}
-
-			wo_list += _create_work_orders([work_order_item], self.company,
-				ignore_permissions=ignore_permissions, ignore_version=ignore_version, ignore_feed=ignore_feed)
+				"max_qty": d.stock_fabric_length,
+			})
 
-			if publish_progress:
-				publish_print_order_progress(self.name, "Creating Work Orders", i + 1, len(self.items))
+		wo_list = self.make_print_order_work_orders(wo_items, "print_order_item", publish_progress=publish_progress,
+			ignore_permissions=ignore_permissions, ignore_version=ignore_version, ignore_feed=ignore_feed,
+			start_journal=start_journal, commit=commit)
 
 		if not wo_list:
 			frappe.msgprint(_("Work Orders already created"))
@@ -538,8 +598,11 @@ class PrintOrder(TextileOrder):
 		ignore_permissions=False,
 		ignore_version=True,
 		ignore_feed=True,
+		start_journal=None,
+		commit=False,
+		row_names=None,
 	):
-		from erpnext.manufacturing.doctype.work_order.work_order import _create_work_orders
+		completed_rows = set(start_journal.get("work_orders") or []) if start_journal else set()
 
 		sales_orders = frappe.get_all("Sales Order Item", 'distinct parent as sales_order', {
 			'print_order': self.name,
@@ -549,32 +612,71 @@ class PrintOrder(TextileOrder):
 		if not sales_orders:
 			frappe.throw(_("Please create Sales Order first"))
 
+		print_order_rows = {d.name: d for d in self.items}
+
 		wo_items = []
 		for so in sales_orders:
 			so_doc = frappe.get_doc('Sales Order', so)
-			wo_items += so_doc.get_work_order_items(item_condition=lambda d: d.print_order == self.name)
+			so_print_order_items = {d.name: d.print_order_item for d in so_doc.items if d.print_order == self.name}
 
-		wo_list = []
-		for i, d in enumerate(wo_items):
-			wo_list += _create_work_orders([d], self.company,
-				ignore_permissions=ignore_permissions, ignore_version=ignore_version, ignore_feed=ignore_feed)
-			if publish_progress:
-				publish_print_order_progress(self.name, "Creating Work Orders", i + 1, len(wo_items))
+			for d in so_doc.get_work_order_items(item_condition=lambda d: d.print_order == self.name
+					and (not row_names or d.print_order_item in row_names)):
+				if d.get("sales_order_item") in completed_rows:
+					continue
+
+				# Order references are set here so that they are not fetched again for every Work Order
+				print_order_item = so_print_order_items.get(d.get("sales_order_item"))
+				if print_order_item in print_order_rows:
+					d["print_order"] = self.name
+					d["print_order_item"] = print_order_item
+					d["max_qty"] = print_order_rows[print_order_item].stock_fabric_length
+
+				wo_items.append(d)
+
+		wo_list = self.make_print_order_work_orders(wo_items, "sales_order_item", publish_progress=publish_progress,
+			ignore_permissions=ignore_permissions, ignore_version=ignore_version, ignore_feed=ignore_feed,
+			start_journal=start_journal, commit=commit)
 
 		if not wo_list:
 			frappe.msgprint(_("Work Order already created"))
 
 		return wo_list
 
+	def make_print_order_work_orders(self, wo_items, row_field, publish_progress=True,
+			ignore_permissions=False, ignore_version=True, ignore_feed=True, start_journal=None, commit=False):
+		from textile.overrides.work_order_hooks import get_print_order_details
+
+		def on_batch_complete(batch, completed, total):
+			if start_journal is not None:
+				start_journal.setdefault("work_orders", []).extend([d.get(row_field) for d in batch])
+				self.update_start_journal(start_journal, commit=commit)
+
+			if publish_progress:
+				publish_print_order_progress(self.name, "Creating Work Orders", completed, total)
+
+		get_print_order_details(self.name, order_doc=self)
+
+		return self.make_work_orders(wo_items, on_batch_complete=on_batch_complete, batch_size=start_journal_chunk_size,
+			ignore_permissions=ignore_permissions, ignore_version=ignore_version, ignore_feed=ignore_feed)
+
 	def set_item_creation_status(self, update=False, update_modified=True):
 		self.items_created = cint(all(d.item_code and d.design_bom for d in self.items))
 		if update:
 			self.db_set("items_created", self.items_created, update_modified=update_modified)
 
-	def set_sales_order_status(self, update=False, update_modified=True):
-		data = self.get_ordered_status_data()
+	def get_status_rows(self, row_names=None):
+		# Status of rows not affected by a transaction is taken from their stored values
+		if row_names is None:
+			return self.items
 
-		for d in self.items:
+		row_names = set(row_names)
+		return [d for d in self.items if d.name in row_names]
+
+	def set_sales_order_status(self, update=False, update_modified=True, row_names=None):
+		rows = self.get_status_rows(row_names)
+		data = self.get_ordered_status_data(rows)
+
+		for d in rows:
 			d.ordered_qty = flt(data.ordered_qty_map.get(d.name))
 			if update:
 				d.db_set({
@@ -587,12 +689,12 @@ class PrintOrder(TextileOrder):
 				'per_ordered': self.per_ordered
 			}, update_modified=update_modified)
 
-	def get_ordered_status_data(self):
+	def get_ordered_status_data(self, rows=None):
 		out = frappe._dict()
 		out.ordered_qty_map = {}
 
 		if self.docstatus == 1:
-			row_names = [d.name for d in self.items]
+			row_names = [d.name for d in (self.items if rows is None else rows)]
 			if row_names:
 				ordered_data = frappe.db.sql("""
 					SELECT i.print_order_item, i.stock_qty
@@ -611,8 +713,11 @@ class PrintOrder(TextileOrder):
 		self.validate_completed_qty('ordered_qty', 'stock_print_length', self.items,
 			from_doctype=from_doctype, row_names=row_names)
 
-	def set_fabric_transfer_status(self, update=False, update_modified=True):
-		self.fabric_transfer_qty = self.get_fabric_transfer_qty()
+	def set_fabric_transfer_status(self, update=False, update_modified=True, use_stored_qty=False):
+		if use_stored_qty:
+			self.fabric_transfer_qty = flt(self.fabric_transfer_qty)
+		else:
+			self.fabric_transfer_qty = self.get_fabric_transfer_qty()
 		rounded_transfer_qty = flt(self.fabric_transfer_qty, self.precision("fabric_transfer_qty"))
 
 		if self.skip_transfer or (self.status == "Closed" and rounded_transfer_qty <= 0):
@@ -651,10 +756,11 @@ class PrintOrder(TextileOrder):
 
 		return out
 
-	def set_production_packing_status(self, update=False, update_modified=True):
-		data = self.get_production_packing_data()
+	def set_production_packing_status(self, update=False, update_modified=True, row_names=None):
+		rows = self.get_status_rows(row_names)
+		data = self.get_production_packing_data(rows)
 
-		for d in self.items:
+		for d in rows:
 			d.work_order_qty = flt(data.work_order_qty_map.get(d.name))
 			d.produced_qty = flt(data.produced_qty_map.get(d.name))
 			d.packed_qty = flt(data.packed_qty_map.get(d.name))
@@ -690,7 +796,7 @@ class PrintOrder(TextileOrder):
 				'packing_status': self.packing_status,
 			}, update_modified=update_modified)
 
-	def get_production_packing_data(self):
+	def get_production_packing_data(self, rows=None):
 		out = frappe._dict()
 		out.work_order_qty_map = {}
 		out.produced_qty_map = {}
@@ -699,7 +805,25 @@ class PrintOrder(TextileOrder):
 		out.has_work_order_to_produce = False
 
 		if self.docstatus == 1:
-			row_names = [d.name for d in self.items]
+			row_names = [d.name for d in (self.items if rows is None else rows)]
+
+			# Pending Work Orders of other rows are checked without aggregating them
+			if rows is not None:
+				out.has_work_order_to_produce = bool(frappe.db.sql("""
+					SELECT EXISTS(
+						SELECT 1 FROM `tabWork Order`
+						WHERE docstatus = 1 AND print_order = %s
+							AND (production_status = 'To Produce' OR subcontracting_status = 'To Receive')
+					)
+				""", self.name)[0][0])
+
+				out.has_work_order_to_pack = bool(frappe.db.sql("""
+					SELECT EXISTS(
+						SELECT 1 FROM `tabWork Order`
+						WHERE docstatus = 1 AND print_order = %s AND packing_status != 'Packed'
+					)
+				""", self.name)[0][0])
+
 			if row_names:
 				# Work Order
 				work_order_data = frappe.db.sql("""
@@ -738,10 +862,11 @@ class PrintOrder(TextileOrder):
 		self.validate_completed_qty('packed_qty', 'stock_print_length', self.items,
 			from_doctype=from_doctype, row_names=row_names, allowance_type="production")
 
-	def set_delivery_status(self, update=False, update_modified=True):
-		data = self.get_delivered_status_data()
+	def set_delivery_status(self, update=False, update_modified=True, row_names=None):
+		rows = self.get_status_rows(row_names)
+		data = self.get_delivered_status_data(rows)
 
-		for d in self.items:
+		for d in rows:
 			d.delivered_qty = flt(data.delivered_qty_map.get(d.name))
 			if update:
 				d.db_set({
@@ -761,13 +886,13 @@ class PrintOrder(TextileOrder):
 				'delivery_status': self.delivery_status,
 			}, update_modified=update_modified)
 
-	def get_delivered_status_data(self):
+	def get_delivered_status_data(self, rows=None):
 		out = frappe._dict()
 		out.delivered_qty_map = {}
 		out.has_incomplete_delivery = False
 
 		if self.docstatus == 1:
-			row_names = [d.name for d in self.items]
+			row_names = [d.name for d in (self.items if rows is None else rows)]
 			if row_names:
 				out.delivered_qty_map = dict(frappe.db.sql("""
 					select print_order_item, sum(delivered_qty * conversion_factor)
@@ -793,19 +918,35 @@ class PrintOrder(TextileOrder):
 			from_doctype=from_doctype, row_names=row_names, allowance_type="qty")
 
 	def _background_start_print_order(self, fabric_transfer_qty, publish_progress=True):
-		self._start_print_order.catch(self, fabric_transfer_qty=fabric_transfer_qty, publish_progress=publish_progress)
+		self._start_print_order.catch(self, fabric_transfer_qty=fabric_transfer_qty, publish_progress=publish_progress,
+			commit=True)
 
 	@frappe.catch_realtime_msgprint()
-	def _start_print_order(self, fabric_transfer_qty, publish_progress=True):
-		frappe.flags.skip_print_order_status_update = True
+	def _start_print_order(self, fabric_transfer_qty, publish_progress=True, commit=False):
+		# Order status is updated once at the end
+		with skip_order_status_updates(self.doctype, self.name):
+			# Completed steps of a previously failed start are skipped
+			start_journal = self.get_start_journal()
 
-		# Design Items
-		if not all(d.item_code and d.design_bom for d in self.items):
-			self._create_design_items_and_boms(publish_progress=publish_progress,
-				ignore_permissions=True, ignore_version=True, ignore_feed=True)
+			# Design Items
+			if not all(d.item_code and d.design_bom for d in self.items):
+				self._create_design_items_and_boms(publish_progress=publish_progress,
+					ignore_permissions=True, ignore_version=True, ignore_feed=True, commit=commit)
+
+			self.start_fabric_transfer_and_sales_order(fabric_transfer_qty, start_journal,
+				publish_progress=publish_progress, commit=commit)
+
+			# Work Orders
+			if flt(self.per_work_ordered) < 100:
+				self.create_work_orders(publish_progress=publish_progress,
+					ignore_permissions=True, ignore_version=True, ignore_feed=True,
+					start_journal=start_journal, commit=commit)
+
+		self.update_status_after_start()
 
+	def start_fabric_transfer_and_sales_order(self, fabric_transfer_qty, start_journal, publish_progress=True, commit=False):
 		# Fabric Transfer
-		if flt(fabric_transfer_qty) > 0 and not self.skip_transfer:
+		if flt(fabric_transfer_qty) > 0 and not self.skip_transfer and not start_journal.stock_entry:
 			if publish_progress:
 				publish_print_order_progress(self.name, "Transferring Fabric", 0, 1)
 
@@ -816,6 +957,9 @@ class PrintOrder(TextileOrder):
 			stock_entry.save()
 			stock_entry.submit()
 
+			start_journal.stock_entry = stock_entry.name
+			self.update_start_journal(start_journal, commit=commit)
+
 			stock_entry_row = stock_entry.items[0]
 
 			fabric_transfer_msg = _("Fabric Transferred to Work in Progress Warehouse ({0} {1}): {2}").format(
@@ -829,7 +973,7 @@ class PrintOrder(TextileOrder):
 				publish_print_order_progress(self.name, "Transferring Fabric", 1, 1)
 
 		# Sales Order
-		if flt(self.per_ordered) < 100 and not self.is_internal_customer:
+		if flt(self.per_ordered) < 100 and not self.is_internal_customer and not start_journal.sales_order:
 			if publish_progress:
 				publish_print_order_progress(self.name, "Creating Sales Order", 0, 1)
 
@@ -840,6 +984,9 @@ class PrintOrder(TextileOrder):
 			sales_order.save()
 			sales_order.submit()
 
+			start_journal.sales_order = sales_order.name
+			self.update_start_journal(start_journal, commit=commit)
+
 			sales_order_msg = _("Sales Order created: {0}").format(
 				frappe.utils.get_link_to_form("Sales Order", sales_order.name)
 			)
@@ -848,59 +995,149 @@ class PrintOrder(TextileOrder):
 			if publish_progress:
 				publish_print_order_progress(self.name, "Creating Sales Order", 1, 1)
 
-		# Work Orders
-		if flt(self.per_work_ordered) < 100:
-			self.create_work_orders(publish_progress=publish_progress,
-				ignore_permissions=True, ignore_version=True, ignore_feed=True)
+	def update_status_after_start(self):
+		self.update_start_journal(None)
 
-		# Status Update
-		frappe.flags.skip_print_order_status_update = False
+		queue_order_status_update(self.doctype, self.name, status_update_methods,
+			validate_methods=["validate_ordered_qty", "validate_work_order_qty"])
 
-		self.set_item_creation_status(update=True)
-		self.set_fabric_transfer_status(update=True)
-		self.set_sales_order_status(update=True)
-		self.set_production_packing_status(update=True)
-		self.set_delivery_status(update=True)
-		self.set_status(update=True)
+	def get_start_journal(self):
+		start_journal = self.get("start_journal")
+		if isinstance(start_journal, str):
+			start_journal = json.loads(start_journal)
 
-		self.validate_ordered_qty()
-		self.validate_work_order_qty()
+		return frappe._dict(start_journal or {})
 
-		self.notify_update()
+	def update_start_journal(self, start_journal, commit=False):
+		self.db_set("start_journal", frappe.as_json(start_journal) if start_journal else None, update_modified=False)
+		if commit:
+			frappe.db.commit()
 
-	def _create_design_items_and_boms(self, publish_progress=True, ignore_permissions=False, ignore_version=True, ignore_feed=True):
-		for i, d in enumerate(self.items):
-			if not d.item_code:
-				item_doc = self.make_design_item(d)
-				item_doc.flags.ignore_version = ignore_version
-				item_doc.flags.ignore_feed = ignore_feed
-				item_doc.flags.ignore_permissions = ignore_permissions
-				item_doc.flags.from_print_order = True
-				item_doc.save()
+	def _create_design_items_and_boms(self, publish_progress=True, ignore_permissions=False, ignore_version=True, ignore_feed=True,
+			commit=False, row_names=None):
+		# Identical designs in the order share one item
+		design_item_map = {}
+		for d in self.items:
+			if d.item_code:
+				design_item_map.setdefault(self.get_design_item_key(d), (d.item_code, d.item_name))
+
+		template_items = {}
+		template_boms = {}
+		items = [d for d in self.items if not row_names or d.name in row_names]
+
+		# Rows are committed in chunks when running in background so that a failed run can resume
+		chunk_size = start_journal_chunk_size if commit else len(items)
+		for start in range(0, len(items), chunk_size or 1):
+			rows = items[start:start + chunk_size]
+			row_updates = {}
+			new_items = []
+
+			for i, d in enumerate(rows, start):
+				if not d.item_code:
+					design_key = self.get_design_item_key(d)
+					if design_key not in design_item_map:
+						# Design items of an order only differ by design, so the first one is validated and saved
+						# and the rest are copied from it
+						template_item = template_items.get(d.stock_uom)
+						item_doc = make_design_item_from_template(template_item, d) if template_item else None
+
+						if item_doc:
+							new_items.append(item_doc)
+						else:
+							item_doc = self.make_design_item(d)
+							item_doc.flags.ignore_version = ignore_version
+							item_doc.flags.ignore_feed = ignore_feed
+							item_doc.flags.ignore_permissions = ignore_permissions
+							item_doc.flags.from_print_order = True
+							item_doc.save()
+
+							if d.stock_uom not in template_items and can_copy_from_template(item_doc,
+									(item_doc.name, item_doc.item_name, item_doc.image), design_item_fields):
+								template_items[d.stock_uom] = item_doc
+
+						design_item_map[design_key] = (item_doc.name, item_doc.item_name)
+
+					d.item_code, d.item_name = design_item_map[design_key]
+					row_updates.setdefault(d.name, {}).update({"item_code": d.item_code, "item_name": d.item_name})
+
+				if publish_progress:
+					publish_print_order_progress(self.name, "Creating Design Items and BOMs", i + 1, len(items))
+
+			insert_design_items_from_template(new_items)
+
+			bom_rows = [d for d in rows if not d.design_bom]
+			for d in self.create_design_boms(bom_rows, template_boms=template_boms,
+					ignore_permissions=ignore_permissions, ignore_version=ignore_version, ignore_feed=ignore_feed):
+				row_updates.setdefault(d.name, {})["design_bom"] = d.design_bom
+
+			if row_updates:
+				frappe.db.bulk_update("Print Order Item", row_updates)
+
+			if commit:
+				frappe.db.commit()
+
+		queue_order_status_update(self.doctype, self.name, ["set_item_creation_status"])
 
-				d.db_set({
-					"item_code": item_doc.name,
-					"item_name": item_doc.item_name
-				})
+		frappe.msgprint(_("Design Items and BOMs created successfully."))
 
-			if not d.design_bom:
-				bom_doc = self.make_design_bom(d)
-				bom_doc.flags.ignore_version = ignore_version
-				bom_doc.flags.ignore_feed = ignore_feed
-				bom_doc.flags.ignore_permissions = ignore_permissions
-				bom_doc.save()
-				bom_doc.submit()
+	def create_design_boms(self, rows, template_boms=None, ignore_permissions=False, ignore_version=True, ignore_feed=True):
+		from textile.utils import bulk_insert_docs
+
+		if not rows:
+			return []
+
+		item_details_map = {}
+		for d in frappe.get_all("Item", filters={"name": ["in", list(set(d.item_code for d in rows))]},
+				fields=["name", "item_name", "description", "image", "stock_uom"]):
+			item_details_map[d.name] = d
+
+		# BOMs of an order only differ by design item, so the first one is validated and submitted
+		# and the rest are copied from it
+		if template_boms is None:
+			template_boms = {}
+
+		design_bom_map = {}
+		new_boms = []
+		for d in rows:
+			if d.item_code not in design_bom_map:
+				item_details = item_details_map[d.item_code]
+				template_bom = template_boms.get(item_details.stock_uom)
+
+				if not template_bom:
+					bom_doc = self.make_design_bom(d)
+					bom_doc.flags.ignore_version = ignore_version
+					bom_doc.flags.ignore_feed = ignore_feed
+					bom_doc.flags.ignore_permissions = ignore_permissions
+					bom_doc.save()
+					bom_doc.submit()
+
+					if can_copy_from_template(bom_doc, (bom_doc.item, bom_doc.item_name, bom_doc.image),
+							design_bom_item_fields):
+						template_boms[item_details.stock_uom] = bom_doc
+				else:
+					bom_doc = make_design_bom_from_template(template_bom, item_details)
+					new_boms.append(bom_doc)
 
-				d.db_set("design_bom", bom_doc.name)
+				design_bom_map[d.item_code] = bom_doc.name
 
-			if publish_progress:
-				publish_print_order_progress(self.name, "Creating Design Items and BOMs", i + 1, len(self.items))
+			d.design_bom = design_bom_map[d.item_code]
 
-		if not frappe.flags.skip_print_order_status_update:
-			self.set_item_creation_status(update=True)
-			self.notify_update()
+		if new_boms:
+			bulk_insert_docs(new_boms)
+			frappe.db.bulk_update("Item", {bom.item: {"default_bom": bom.name} for bom in new_boms})
 
-		frappe.msgprint(_("Design Items and BOMs created successfully."))
+		return rows
+
+	def get_design_item_key(self, row):
+		return (
+			row.design_hash or row.design_image,
+			flt(row.design_width),
+			flt(row.design_height),
+			flt(row.design_gap),
+			flt(row.per_wastage),
+			cstr(row.design_notes),
+			row.stock_uom,
+		)
 
 	def make_design_item(self, design_item_row):
 		if not design_item_row:
@@ -996,6 +1233,101 @@ class PrintOrder(TextileOrder):
 		return bom_doc
 
 
+def make_design_item_from_template(template_item, design_item_row):
+	# Rows without a Panel conversion are saved so that Item validation reports them
+	template_panel_rows = [d for d in template_item.uom_conversion_graph if d.from_uom == "Panel" and d.to_uom == "Meter"]
+	if not template_panel_rows or flt(design_item_row.panel_length_meter) <= 0:
+		return None
+
+	item_doc = frappe.copy_doc(template_item, ignore_no_copy=False)
+	item_doc.update({
+		"item_code": None,
+		"item_name": design_item_row.design_name,
+		"description": design_item_row.design_name,
+		"image": design_item_row.design_image,
+		"design_width": design_item_row.design_width,
+		"design_height": design_item_row.design_height,
+		"design_gap": design_item_row.design_gap,
+		"per_wastage": design_item_row.per_wastage,
+		"design_notes": design_item_row.design_notes,
+	})
+
+	# Panel conversion depends on the design length
+	item_doc.uom_conversion_graph[template_panel_rows[0].idx - 1].to_qty = design_item_row.panel_length_meter
+	for d in item_doc.get("uoms") or []:
+		if d.uom == "Panel":
+			d.conversion_factor = flt(design_item_row.panel_length_meter)
+
+	set_copied_doc_names(item_doc, docstatus=0)
+	return item_doc
+
+
+def insert_design_items_from_template(item_docs):
+	# Copied items skip Item validation, which was run on the template, and Item.after_insert and on_update,
+	# which have no opening stock, variants or item prices to update for a new design item.
+	# Version and feed are not created. Design images are still attached as the on_update hook would.
+	from frappe.core.doctype.file.utils import attach_files_to_document
+	from textile.utils import bulk_insert_docs
+
+	if not item_docs:
+		return
+
+	bulk_insert_docs(item_docs)
+	for item_doc in item_docs:
+		attach_files_to_document(item_doc, "on_update")
+
+
+def make_design_bom_from_template(template_bom, item_details):
+	# Copied BOMs skip BOM validate and on_submit. Costs and exploded items are the template's,
+	# as the components of an order are the same for every design. The item fields BOM validation sets from the item
+	# are set here and Item.default_bom, set by on_submit, is updated by the caller. Version and feed are not created.
+	bom_doc = frappe.copy_doc(template_bom, ignore_no_copy=False)
+	bom_doc.update({
+		"item": item_details.name,
+		"item_name": item_details.item_name,
+		"description": item_details.description,
+		"image": item_details.image,
+		"uom": item_details.stock_uom,
+		"is_active": 1,
+		"is_default": 1,
+	})
+
+	set_copied_doc_names(bom_doc, docstatus=1)
+	return bom_doc
+
+
+def can_copy_from_template(template_doc, item_values, item_fields):
+	# Copies only get item_fields set, so no other field of the template or its rows may hold one of its item values
+	item_values = set(v for v in item_values if v)
+	ignore_fields = set(frappe.model.default_fields) | set(frappe.model.child_table_fields)
+
+	for d in [template_doc] + template_doc.get_all_children():
+		for fieldname, value in d.get_valid_dict(ignore_virtual=True).items():
+			if fieldname in ignore_fields or (d is template_doc and fieldname in item_fields):
+				continue
+
+			if isinstance(value, str) and value in item_values:
+				return False
+
+	return True
+
+
+def set_copied_doc_names(doc, docstatus):
+	from frappe.model.naming import set_new_name
+
+	doc.set_new_name()
+
+	timestamp = now()
+	for d in [doc] + doc.get_all_children():
+		if d is not doc:
+			d.parent = doc.name
+			set_new_name(d)
+
+		d.docstatus = docstatus
+		d.owner = d.modified_by = frappe.session.user
+		d.creation = d.modified = timestamp
+
+
 def validate_uom_and_qty_type(doc):
 	fn_map = frappe._dict()
 
@@ -1180,13 +1512,145 @@ def start_print_order(print_order, fabric_transfer_qty=None):
 				frappe.utils.get_link_to_form("Item", doc.fabric_item), doc.get_formatted("fabric_stock_qty")
 			))
 
-	if len(doc.items) > 5:
+	shard_size = cint(frappe.db.get_single_value("Fabric Printing Settings", "print_order_start_shard_size"))
+
+	if shard_size and len(doc.items) > shard_size:
+		enqueue_print_order_start_step(doc.name, print_order_start_steps[0], fabric_transfer_qty, shard_size)
+		frappe.msgprint(_("Starting Print Order in background..."), alert=True)
+	elif len(doc.items) > 5:
 		doc.queue_action("_background_start_print_order", fabric_transfer_qty=fabric_transfer_qty, timeout=1800)
 		frappe.msgprint(_("Starting Print Order in background..."), alert=True)
 	else:
 		doc._start_print_order(fabric_transfer_qty=fabric_transfer_qty)
 
 
+def enqueue_print_order_start_step(print_order, step, fabric_transfer_qty, shard_size):
+	job_args = frappe._dict(print_order=print_order, step=step, fabric_transfer_qty=fabric_transfer_qty,
+		shard_size=shard_size)
+
+	if step not in sharded_start_step_titles:
+		frappe.enqueue(run_print_order_start_step, queue="long", timeout=1800,
+			job_id=f"print_order_start::{print_order}::{step}", deduplicate=True, enqueue_after_commit=True,
+			**job_args)
+		return
+
+	doc = frappe.get_doc("Print Order", print_order)
+	shards = get_print_order_start_shards(doc, step, shard_size)
+	if not shards:
+		enqueue_next_print_order_start_step(print_order, step, fabric_transfer_qty, shard_size)
+		return
+
+	# Shards count down the pending jobs, the last one to finish enqueues the next step
+	cache = frappe.cache()
+	cache_key = get_print_order_start_cache_key(print_order, step)
+	pipe = cache.pipeline()
+	pipe.delete(cache_key)
+	pipe.hset(cache_key, mapping={
+		"pending_shards": len(shards),
+		"completed_rows": 0,
+		"total_rows": sum(len(row_names) for row_names in shards),
+	})
+	pipe.expire(cache_key, 86400)
+	pipe.execute()
+
+	publish_print_order_progress(print_order, sharded_start_step_titles[step], 0, 1)
+
+	for i, row_names in enumerate(shards):
+		frappe.enqueue(run_print_order_start_shard, queue="long", timeout=1800,
+			job_id=f"print_order_start::{print_order}::{step}::{i}", deduplicate=True, enqueue_after_commit=True,
+			row_names=row_names, **job_args)
+
+
+def enqueue_next_print_order_start_step(print_order, step, fabric_transfer_qty, shard_size):
+	next_index = print_order_start_steps.index(step) + 1
+	if next_index < len(print_order_start_steps):
+		enqueue_print_order_start_step(print_order, print_order_start_steps[next_index], fabric_transfer_qty, shard_size)
+
+
+def get_print_order_start_shards(doc, step, shard_size):
+	if step == "Design Items":
+		# Rows of the same design are kept in one shard so that they share one design item
+		design_rows = {}
+		for d in doc.items:
+			if not (d.item_code and d.design_bom):
+				design_rows.setdefault(doc.get_design_item_key(d), []).append(d.name)
+
+		shards = []
+		for row_names in design_rows.values():
+			if not shards or len(shards[-1]) >= shard_size:
+				shards.append([])
+			shards[-1] += row_names
+
+		return shards
+	else:
+		row_names = [d.name for d in doc.items]
+		return [row_names[i:i + shard_size] for i in range(0, len(row_names), shard_size)]
+
+
+def get_print_order_start_cache_key(print_order, step):
+	return frappe.cache().make_key(f"print_order_start::{print_order}::{step}")
+
+
+def run_print_order_start_step(print_order, step, fabric_transfer_qty=None, shard_size=None):
+	doc = frappe.get_doc("Print Order", print_order)
+
+	if step == "Fabric Transfer and Sales Order":
+		with skip_order_status_updates(doc.doctype, doc.name):
+			doc.start_fabric_transfer_and_sales_order(fabric_transfer_qty, doc.get_start_journal(), commit=True)
+
+		enqueue_next_print_order_start_step(print_order, step, fabric_transfer_qty, shard_size)
+	elif step == "Status Update":
+		doc.update_status_after_start()
+
+
+def run_print_order_start_shard(print_order, step, row_names, fabric_transfer_qty=None, shard_size=None):
+	cache_key = get_print_order_start_cache_key(print_order, step)
+
+	try:
+		doc = frappe.get_doc("Print Order", print_order)
+
+		with skip_order_status_updates(doc.doctype, doc.name):
+			if step == "Design Items":
+				doc._create_design_items_and_boms(publish_progress=False, ignore_permissions=True, commit=True,
+					row_names=row_names)
+			elif step == "Work Orders":
+				# Work Order Qty of rows is not updated on the rows during start
+				doc.set_production_packing_status(row_names=row_names)
+				doc.create_work_orders(publish_progress=False, ignore_permissions=True, row_names=row_names)
+
+		frappe.db.commit()
+	except Exception:
+		frappe.db.rollback()
+		frappe.cache().hincrby(cache_key, "failed_shards", 1)
+		frappe.log_error(_("Failed to start Print Order {0}").format(print_order))
+		publish_print_order_start_error(print_order, step)
+	finally:
+		# Failed shards are counted as well so that the last shard can finish or abort the start
+		pipe = frappe.cache().pipeline()
+		pipe.hincrby(cache_key, "completed_rows", len(row_names))
+		pipe.hget(cache_key, "total_rows")
+		pipe.hincrby(cache_key, "pending_shards", -1)
+		pipe.hget(cache_key, "failed_shards")
+		completed_rows, total_rows, pending_shards, failed_shards = pipe.execute()
+
+		publish_print_order_progress(print_order, sharded_start_step_titles[step], completed_rows, cint(total_rows))
+
+		if pending_shards == 0:
+			frappe.cache().delete(cache_key)
+			if not cint(failed_shards):
+				enqueue_next_print_order_start_step(print_order, step, fabric_transfer_qty, shard_size)
+
+
+def publish_print_order_start_error(print_order, step):
+	frappe.publish_realtime("msgprint", {
+		"title": _("Error"),
+		"indicator": "red",
+		"message": _("Could not complete {0} while starting Print Order {1}. Please start the Print Order again.").format(
+			_(sharded_start_step_titles[step]), frappe.utils.get_link_to_form("Print Order", print_order)
+		),
+	}, user=frappe.session.user)
+
+
 @frappe.whitelist()
 def create_design_items_and_boms(print_order):
 	if isinstance(print_order, str):
@@ -1218,7 +1682,8 @@ def _make_sales_order(source_name, target_doc=None, ignore_permissions=False):
 			target.cost_center = source.get("cost_center")
 
 		target.flags.ignore_permissions = ignore_permissions
-		target.run_method("set_missing_values")
+		with batch_price_list_rates():
+			target.run_method("set_missing_values")
 		target.run_method("set_taxes_and_charges")
 		target.run_method("calculate_taxes_and_totals")
 		target.run_method("set_payment_schedule")
@@ -1423,27 +1888,84 @@ def make_customer_fabric_stock_entry(source_name, target_doc=None):
 	return target_doc
 
 
+@frappe.whitelist(methods=["POST"])
+def upload_design_archive(docname, is_private=1):
+	from textile.design_image import extract_design_archive
+	from textile.rotated_image import enqueue_renditions_for_files
+
+	doc = frappe.get_doc("Print Order", docname)
+	doc.check_permission("write")
+
+	if doc.docstatus != 0:
+		frappe.throw(_("Designs can only be uploaded to a draft Print Order"))
+
+	archive = frappe.request.files.get("file")
+	if not archive:
+		frappe.throw(_("Design archive not uploaded"))
+
+	def publish_extraction_progress(count, total, file_name):
+		# TAR archives are read as a stream without a member count and report completion at the end
+		publish_print_order_progress(doc.name, _("Extracting Designs"), count, total or count + 1, description=file_name)
+
+	file_names = extract_design_archive(archive.stream, doc.doctype, doc.name, is_private=cint(is_private),
+		progress_callback=publish_extraction_progress)
+
+	if not file_names:
+		frappe.throw(_("No new design images found in {0}").format(archive.filename))
+
+	publish_print_order_progress(doc.name, _("Reading Design Dimensions"), 0, 1)
+	doc.save()
+	publish_print_order_progress(doc.name, _("Reading Design Dimensions"), 1, 1)
+
+	enqueue_renditions_for_files(file_names)
+
+	frappe.msgprint(_("{0} designs added from {1}").format(len(file_names), archive.filename), alert=True)
+
+
 @frappe.whitelist()
 def get_image_details(image_url, throw_not_found=True):
-	doc_name = frappe.get_value('File', filters={'file_url': image_url})
+	return get_image_details_map([image_url], throw_not_found=throw_not_found)[image_url]
 
-	if not doc_name:
-		frappe.throw(_("File {0} not found").format(image_url))
 
-	file_doc = frappe.get_doc("File", doc_name)
-	file_name = file_doc.get("original_file_name") or file_doc.file_name
+def get_image_details_map(image_urls, throw_not_found=True):
+	image_urls = list(dict.fromkeys(image_urls))
+	if not image_urls:
+		return {}
 
-	out = frappe._dict()
-	out.design_name = ".".join(file_name.split('.')[:-1]) or file_name
+	file_fields = ["name", "file_name", "file_url", "is_private", "content_hash"]
+	if frappe.get_meta("File").has_field("original_file_name"):
+		file_fields.append("original_file_name")
 
-	file_full_path = file_doc.get_full_path()
-	try:
-		im = Image.open(file_full_path)
-		out.design_width = flt(im.size[0] / 10, 1)
-		out.design_height = flt(im.size[1] / 10, 1)
-	except FileNotFoundError:
-		frappe.msgprint(_("Design {0} file not found").format(out.design_name or file_full_path),
-			raise_exception=throw_not_found, indicator="red" if throw_not_found else "orange")
+	file_docs = {}
+	image_url_set = set(image_urls)
+	for d in frappe.get_all("File", filters={"file_url": ["in", image_urls]}, fields=file_fields):
+		# Case sensitive match
+		if d.file_url in image_url_set and d.file_url not in file_docs:
+			file_docs[d.file_url] = frappe.get_doc(dict(doctype="File", **d))
+
+	for image_url in image_urls:
+		if image_url not in file_docs:
+			frappe.throw(_("File {0} not found").format(image_url))
+
+	image_info_map = get_design_image_info_map(file_docs.values())
+
+	out = {}
+	for image_url in image_urls:
+		file_doc = file_docs[image_url]
+		file_name = file_doc.get("original_file_name") or file_doc.file_name
+
+		details = frappe._dict()
+		details.design_name = ".".join(file_name.split('.')[:-1]) or file_name
+
+		image_info = image_info_map.get(image_url)
+		if image_info:
+			details.design_width = flt(image_info.width / 10, 1)
+			details.design_height = flt(image_info.height / 10, 1)
+		else:
+			frappe.msgprint(_("Design {0} file not found").format(details.design_name or file_doc.get_full_path()),
+				raise_exception=throw_not_found, indicator="red" if throw_not_found else "orange")
+
+		out[image_url] = details
 
 	return out
 
@@ -1544,6 +2066,42 @@ def get_process_component_details(component_item_code, component_item_field):
 
 
 def publish_print_order_progress(print_order, title, progress, total, description=None):
+	# Updates are coalesced to at most one per interval and progress step, the first and final updates are always sent
+	current_time = time.monotonic()
+	evict_progress_publish_state(current_time)
+
+	state_key = (frappe.local.site, print_order, title)
+	state = progress_publish_state.get(state_key)
+
+	percent = flt(progress) / flt(total) * 100 if flt(total) else 0
+	is_final = flt(total) and flt(progress) >= flt(total)
+
+	if state and not is_final:
+		min_interval = flt(frappe.conf.get("print_order_progress_interval", 0.5))
+		min_step = flt(frappe.conf.get("print_order_progress_step"))
+		if current_time - state.published_at < min_interval or percent - state.percent < min_step:
+			return
+
+	if not state or current_time - state.listener_checked_at >= progress_listener_check_interval:
+		has_listener = has_print_order_progress_listener(print_order)
+		listener_checked_at = current_time
+	else:
+		has_listener = state.has_listener
+		listener_checked_at = state.listener_checked_at
+
+	if is_final:
+		progress_publish_state.pop(state_key, None)
+	else:
+		progress_publish_state[state_key] = frappe._dict({
+			"published_at": current_time,
+			"percent": percent,
+			"has_listener": has_listener,
+			"listener_checked_at": listener_checked_at,
+		})
+
+	if not has_listener:
+		return
+
 	progress_data = {
 		"print_order": print_order,
 		"title": title,
@@ -1555,6 +2113,30 @@ def publish_print_order_progress(print_order, title, progress, total, descriptio
 	frappe.publish_realtime("print_order_progress", progress_data, doctype="Print Order", docname=print_order)
 
 
+def evict_progress_publish_state(current_time):
+	# Progress that never reached its final update, such as a failed or cancelled run, is dropped after a while
+	stale_keys = [
+		key for key, state in progress_publish_state.items()
+		if current_time - state.published_at > progress_publish_state_ttl
+	]
+	for key in stale_keys:
+		progress_publish_state.pop(key, None)
+
+
+@frappe.whitelist()
+def subscribe_print_order_progress(print_order):
+	frappe.has_permission("Print Order", "read", print_order, throw=True)
+	frappe.cache().set_value(get_progress_listener_cache_key(print_order), 1, expires_in_sec=progress_listener_ttl)
+
+
+def has_print_order_progress_listener(print_order):
+	return bool(frappe.cache().get_value(get_progress_listener_cache_key(print_order)))
+
+
+def get_progress_listener_cache_key(print_order):
+	return f"print_order_progress_listener::{print_order}"
+
+
 @frappe.whitelist()
 @frappe.validate_and_sanitize_search_inputs
 def get_print_orders_to_be_delivered(doctype, txt, searchfield, start, page_len, filters, as_dict):
@@ -27,6 +27,16 @@ permission_query_conditions = {
 doc_events = {
 	"Customer": {
 		"validate": "textile.overrides.customer_hooks.customer_order_default_validate",
+		"on_update": "textile.overrides.customer_hooks.on_customer_update",
+	},
+	"Customer Group": {
+		"on_update": "textile.controllers.textile_pricing_rule.clear_textile_pricing_rule_cache",
+		"after_rename": "textile.controllers.textile_pricing_rule.clear_textile_pricing_rule_cache",
+		"on_trash": "textile.controllers.textile_pricing_rule.clear_textile_pricing_rule_cache",
+	},
+	"Item Price": {
+		"on_update": "textile.controllers.textile_pricing_rule.on_item_price_change",
+		"on_trash": "textile.controllers.textile_pricing_rule.on_item_price_change",
 	},
 	"UOM": {
 		"before_rename": "textile.overrides.uom_hooks.before_uom_rename",
@@ -36,7 +46,17 @@ doc_events = {
 	},
 	"BOM": {
 		"on_cancel": "textile.overrides.bom_hooks.on_bom_cancel",
-	}
+	},
+	"Work Order": {
+		"on_update_after_submit": "textile.overrides.work_order_hooks.on_work_order_update_after_submit",
+	},
+	"File": {
+		"after_insert": [
+			"textile.rotated_image.on_file_insert",
+			"textile.design_image.on_file_insert",
+		],
+		"on_trash": "textile.design_image.clear_design_image_cache",
+	},
 }
 
 override_doctype_class = {
@@ -152,15 +172,27 @@ get_price_list_rate = "textile.overrides.item_details_hooks.get_price_list_rate"
 scheduler_events = {
 	"hourly_long": [
 		"textile.textile.doctype.textile_email_digest.textile_email_digest.send_textile_email_digest",
+		"textile.controllers.order_qty_audit.audit_order_qty",
 	],
 }
 
+default_log_clearing_doctypes = {
+	"Textile Order Qty Drift": 30,
+}
+
+ignore_links_on_delete = ["Textile Order Qty Drift"]
+
 fixtures = [
 	{
 		"doctype": "Custom Field",
 		"filters": {
 			"name": ["in", [
 				'File-rotated_image',
+				'File-rendition_status',
+				'File-preview_small',
+				'File-preview_medium',
+				'File-preview_large',
+				'File-design_hash',
 
 				'Customer-printing_tab',
 				'Customer-printing_cb_1',
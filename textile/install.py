@@ -222,6 +222,7 @@ def after_install():
 	populate_fabric_type()
 	create_printing_uom()
 	update_conversion_factor_global_defaults()
+	add_file_url_index()
 
 
 def populate_textile_item_types():
@@ -302,3 +303,8 @@ def create_printing_uom():
 			"doctype": "UOM",
 			"uom_name": "Panel"
 		}).save(ignore_permissions=True)
+
+
+def add_file_url_index():
+	# Rotated image and design lookups are by file url
+	frappe.db.add_index("File", ["file_url(255)"], index_name="file_url_index")
@@ -1,4 +1,5 @@
 import frappe
+from textile.controllers.order_status_updater import queue_order_status_update
 
 
 def on_bom_cancel(doc, method):
@@ -23,9 +24,7 @@ def unlink_from_print_orders(doc):
 	""", doc.name)
 
 	for name in print_orders:
-		doc = frappe.get_doc("Print Order", name)
-		doc.set_item_creation_status(update=True)
-		doc.notify_update()
+		queue_order_status_update("Print Order", name, ["set_item_creation_status"])
 
 
 def unlink_from_pretreatment_orders(doc):
@@ -1,12 +1,26 @@
 # import frappe
 from frappe import _
 from textile.fabric_printing.doctype.print_order.print_order import validate_uom_and_qty_type
+from textile.controllers.textile_pricing_rule import bump_pricing_version
+
+
+customer_pricing_fields = [
+	"base_printing_rate",
+	"is_fixed_printing_rate",
+	"base_pretreatment_rate",
+	"is_fixed_pretreatment_rate",
+]
 
 
 def customer_order_default_validate(self, hook):
 	validate_uom_and_qty_type(self)
 
 
+def on_customer_update(self, hook):
+	if any(self.has_value_changed(f) for f in customer_pricing_fields):
+		bump_pricing_version()
+
+
 def override_customer_dashboard(data):
 	data["transactions"].append({
 		"label": _("Textile"),
@@ -1,6 +1,9 @@
 import frappe
 # from frappe import _
 from erpnext.stock.doctype.delivery_note.delivery_note import DeliveryNote
+from textile.controllers.order_status_updater import (
+	queue_order_status_update, get_order_for_status_update
+)
 from textile.fabric_printing.doctype.print_order.print_order import validate_transaction_against_print_order
 from textile.fabric_pretreatment.doctype.pretreatment_order.pretreatment_order import validate_transaction_against_pretreatment_order
 from textile.utils import is_row_return_fabric
@@ -27,44 +30,34 @@ class DeliveryNoteDP(DeliveryNote):
 	def update_previous_doc_status(self):
 		super().update_previous_doc_status()
 
-		pretreatment_orders = set([d.pretreatment_order for d in self.items if d.get('pretreatment_order')])
-		for name in pretreatment_orders:
-			doc = frappe.get_doc("Pretreatment Order", name)
-			doc.set_delivery_status(update=True)
-			doc.validate_delivered_qty(from_doctype=self.doctype)
+		status_methods = ["set_delivery_status"]
 
-			# Update packed qty for unpacked returns
-			if self.is_return and self.reopen_order:
-				doc.set_production_packing_status(update=True)
+		# Update packed qty for unpacked returns
+		if self.is_return and self.reopen_order:
+			status_methods.append("set_production_packing_status")
 
-			doc.set_status(update=True)
-			doc.notify_update()
+		pretreatment_orders = set([d.pretreatment_order for d in self.items if d.get('pretreatment_order')])
+		for name in pretreatment_orders:
+			queue_order_status_update("Pretreatment Order", name, status_methods,
+				validate_methods=["validate_delivered_qty"], from_doctype=self.doctype)
 
 		print_orders = set([d.print_order for d in self.items if d.get('print_order')])
 		print_order_row_names = [d.print_order_item for d in self.items if d.get('print_order_item')]
 		for name in print_orders:
-			doc = frappe.get_doc("Print Order", name)
-			doc.set_delivery_status(update=True)
-			doc.validate_delivered_qty(from_doctype=self.doctype, row_names=print_order_row_names)
-
-			# Update packed qty for unpacked returns
-			if self.is_return and self.reopen_order:
-				doc.set_production_packing_status(update=True)
-
-			doc.set_status(update=True)
-			doc.notify_update()
+			queue_order_status_update("Print Order", name, status_methods,
+				validate_methods=["validate_delivered_qty"], from_doctype=self.doctype, row_names=print_order_row_names)
 
 	def update_status(self, status):
 		super().update_status(status)
 
 		pretreatment_orders = set([d.pretreatment_order for d in self.items if d.get('pretreatment_order')])
 		for name in pretreatment_orders:
-			doc = frappe.get_doc("Pretreatment Order", name)
+			doc = get_order_for_status_update("Pretreatment Order", name)
 			doc.run_method("update_status", None)
 
 		print_orders = set([d.print_order for d in self.items if d.get('print_order')])
 		for name in print_orders:
-			doc = frappe.get_doc("Print Order", name)
+			doc = get_order_for_status_update("Print Order", name)
 			doc.run_method("update_status", None)
 
 	def get_skip_sales_invoice(self, row):
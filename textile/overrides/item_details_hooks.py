@@ -1,5 +1,7 @@
 import frappe
-from frappe.utils import cint
+from frappe.utils import cint, flt
+from contextlib import contextmanager
+from textile.controllers.textile_pricing_rule import fabric_price_args
 
 
 def get_item_details(args, out, doc=None, for_validate=False):
@@ -38,9 +40,9 @@ def set_fabric_item_details(args, item, out):
 
 
 def get_price_list_rate(item_code, price_list, args):
-	from textile.fabric_printing.doctype.print_pricing_rule.print_pricing_rule import get_printing_rate
+	from textile.fabric_printing.doctype.print_pricing_rule.print_pricing_rule import get_printing_rate, PrintPricingRule
 	from textile.fabric_pretreatment.doctype.pretreatment_pricing_rule.pretreatment_pricing_rule import \
-		get_pretreatment_rate
+		get_pretreatment_rate, PretreatmentPricingRule
 	from textile.controllers.textile_pricing_rule import get_fabric_rate
 
 	if not item_code or not price_list or args.get("transaction_type") != "selling":
@@ -50,20 +52,80 @@ def get_price_list_rate(item_code, price_list, args):
 	customer = args.get("customer") or (args.get("quotation_to") == "Customer" and args.get("party_name"))
 
 	if item.textile_item_type == "Printed Design":
-		printing_rate = get_printing_rate(item_code, price_list, customer=customer,
-			uom=args.get("uom"), conversion_factor=args.get("conversion_factor"))
-		fabric_rate = get_fabric_rate(item.fabric_item, price_list, args)
-		pretreatment_rate = get_pretreatment_rate_for_printed_fabric(item.fabric_item, price_list, customer,
-			uom=args.get("uom"), conversion_factor=args.get("conversion_factor"))
+		printing_rate = get_batched_rate(
+			("printing", get_rule_signature(PrintPricingRule, item, price_list, customer), get_uom_signature(item, args)),
+			lambda: get_printing_rate(item_code, price_list, customer=customer,
+				uom=args.get("uom"), conversion_factor=args.get("conversion_factor"))
+		)
+		fabric_rate = get_batched_rate(
+			("fabric", item.fabric_item, price_list, get_item_price_signature(args)),
+			lambda: get_fabric_rate(item.fabric_item, price_list, args)
+		)
+		pretreatment_rate = get_batched_rate(
+			("pretreatment_for_printed_fabric", item.fabric_item, price_list, customer, get_uom_signature(item, args)),
+			lambda: get_pretreatment_rate_for_printed_fabric(item.fabric_item, price_list, customer,
+				uom=args.get("uom"), conversion_factor=args.get("conversion_factor"))
+		)
 		return printing_rate + fabric_rate + pretreatment_rate
 
 	elif item.textile_item_type == "Ready Fabric" and args.get("pretreatment_order"):
-		pretreatment_rate = get_pretreatment_rate(item_code, price_list, customer=customer,
-			uom=args.get("uom"), conversion_factor=args.get("conversion_factor"))
-		fabric_rate = get_fabric_rate(item_code, price_list, args)
+		pretreatment_rate = get_batched_rate(
+			("pretreatment", get_rule_signature(PretreatmentPricingRule, item, price_list, customer),
+				get_uom_signature(item, args)),
+			lambda: get_pretreatment_rate(item_code, price_list, customer=customer,
+				uom=args.get("uom"), conversion_factor=args.get("conversion_factor"))
+		)
+		fabric_rate = get_batched_rate(
+			("fabric", item_code, price_list, get_item_price_signature(args)),
+			lambda: get_fabric_rate(item_code, price_list, args)
+		)
 		return pretreatment_rate + fabric_rate
 
 
+@contextmanager
+def batch_price_list_rates():
+	# Rates resolved inside the block are reused by rows with the same pricing signature
+	already_batched = frappe.flags.textile_batched_price_list_rates is not None
+	if not already_batched:
+		frappe.flags.textile_batched_price_list_rates = {}
+
+	try:
+		yield
+	finally:
+		if not already_batched:
+			frappe.flags.textile_batched_price_list_rates = None
+
+
+def get_batched_rate(signature, get_rate):
+	batched_rates = frappe.flags.textile_batched_price_list_rates
+	if batched_rates is None:
+		return get_rate()
+
+	if signature not in batched_rates:
+		batched_rates[signature] = get_rate()
+
+	return batched_rates[signature]
+
+
+def get_rule_signature(rule_class, item, price_list, customer):
+	# Pricing rules only depend on the fabric attributes, price list and customer
+	filters = rule_class.get_filters_dict(item, price_list, customer)
+	return customer or None, tuple(sorted(filters.items()))
+
+
+def get_uom_signature(item, args):
+	uom = args.get("uom")
+	if not uom or uom == item.stock_uom:
+		return (item.stock_uom,)
+
+	# Without a conversion factor the rate is converted using the UOM conversions of the item itself
+	return item.stock_uom, uom, flt(args.get("conversion_factor")) or item.name
+
+
+def get_item_price_signature(args):
+	return tuple(args.get(f) for f in fabric_price_args)
+
+
 def get_pretreatment_rate_for_printed_fabric(ready_fabric_item, price_list, customer, uom, conversion_factor):
 	from textile.fabric_pretreatment.doctype.pretreatment_pricing_rule.pretreatment_pricing_rule import get_pretreatment_rate
 
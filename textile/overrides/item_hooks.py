@@ -3,6 +3,7 @@ from frappe import _
 from erpnext.stock.doctype.item.item import Item
 from frappe.utils import flt
 from textile.utils import gsm_to_grams, get_fabric_item_details, get_yard_to_meter, printing_components
+from textile.controllers.order_status_updater import queue_order_status_update
 
 
 class ItemDP(Item):
@@ -39,9 +40,7 @@ class ItemDP(Item):
 		""", self.name)
 
 		for name in print_orders:
-			doc = frappe.get_doc("Print Order", name)
-			doc.set_item_creation_status(update=True)
-			doc.notify_update()
+			queue_order_status_update("Print Order", name, ["set_item_creation_status"])
 
 	def validate_textile_item_type(self):
 		if self.textile_item_type in ("Ready Fabric", "Greige Fabric", "Printed Design"):
@@ -1,6 +1,7 @@
 import frappe
 from frappe import _
 from erpnext.stock.doctype.packing_slip.packing_slip import PackingSlip
+from textile.controllers.order_status_updater import queue_order_status_update
 from textile.fabric_printing.doctype.print_order.print_order import validate_transaction_against_print_order
 from textile.fabric_pretreatment.doctype.pretreatment_order.pretreatment_order import validate_transaction_against_pretreatment_order
 from textile.overrides.taxes_and_totals_hooks import calculate_panel_qty
@@ -85,20 +86,14 @@ class PackingSlipDP(PackingSlip):
 
 		pretreatment_orders = set([d.pretreatment_order for d in self.items if d.get('pretreatment_order')])
 		for name in pretreatment_orders:
-			doc = frappe.get_doc("Pretreatment Order", name)
-			doc.set_production_packing_status(update=True)
-			doc.validate_packed_qty(from_doctype=self.doctype)
-			doc.set_status(update=True)
-			doc.notify_update()
+			queue_order_status_update("Pretreatment Order", name, ["set_production_packing_status"],
+				validate_methods=["validate_packed_qty"], from_doctype=self.doctype)
 
 		print_orders = set([d.print_order for d in self.items if d.get('print_order')])
 		print_order_row_names = [d.print_order_item for d in self.items if d.get('print_order_item')]
 		for name in print_orders:
-			doc = frappe.get_doc("Print Order", name)
-			doc.set_production_packing_status(update=True)
-			doc.validate_packed_qty(from_doctype=self.doctype, row_names=print_order_row_names)
-			doc.set_status(update=True)
-			doc.notify_update()
+			queue_order_status_update("Print Order", name, ["set_production_packing_status"],
+				validate_methods=["validate_packed_qty"], from_doctype=self.doctype, row_names=print_order_row_names)
 
 	def calculate_totals(self):
 		super().calculate_totals()
@@ -1,6 +1,11 @@
 import frappe
 # from frappe import _
+from frappe.utils import flt
 from erpnext.selling.doctype.sales_order.sales_order import SalesOrder
+from textile.controllers.order_status_updater import (
+	queue_order_status_update, update_order_qty, get_qty_sign,
+	get_order_for_status_update
+)
 from textile.fabric_printing.doctype.print_order.print_order import validate_transaction_against_print_order
 from textile.fabric_pretreatment.doctype.pretreatment_order.pretreatment_order import validate_transaction_against_pretreatment_order
 
@@ -18,40 +23,50 @@ class SalesOrderDP(SalesOrder):
 	def update_previous_doc_status(self):
 		super().update_previous_doc_status()
 
+		qty_sign = get_qty_sign(self)
+		if qty_sign:
+			self.update_textile_order_ordered_qty(qty_sign)
+
 		pretreatment_orders = set([d.pretreatment_order for d in self.items if d.get('pretreatment_order')])
-		if not frappe.flags.skip_pretreatment_order_status_update:
-			for name in pretreatment_orders:
-				doc = frappe.get_doc("Pretreatment Order", name)
-				doc.set_sales_order_status(update=True)
-				doc.set_production_packing_status(update=True)
-				doc.validate_ordered_qty(from_doctype=self.doctype)
-				doc.set_status(update=True)
-				doc.notify_update()
-
-		print_orders = []
-		if not frappe.flags.skip_print_order_status_update:
-			print_orders = set([d.print_order for d in self.items if d.get('print_order')])
-			print_order_row_names = [d.print_order_item for d in self.items if d.get('print_order_item')]
+		for name in pretreatment_orders:
+			queue_order_status_update("Pretreatment Order", name, ["set_sales_order_status", "set_production_packing_status"],
+				validate_methods=["validate_ordered_qty"], from_doctype=self.doctype,
+				row_names=[] if qty_sign else [name], validate_row_names=[name])
 
+		print_orders = set([d.print_order for d in self.items if d.get('print_order')])
+		print_order_row_names = [d.print_order_item for d in self.items if d.get('print_order_item')]
 		for name in print_orders:
-			doc = frappe.get_doc("Print Order", name)
-			doc.set_sales_order_status(update=True)
-			doc.set_production_packing_status(update=True)
-			doc.validate_ordered_qty(from_doctype=self.doctype, row_names=print_order_row_names)
-			doc.set_status(update=True)
-			doc.notify_update()
+			queue_order_status_update("Print Order", name, ["set_sales_order_status", "set_production_packing_status"],
+				validate_methods=["validate_ordered_qty"], from_doctype=self.doctype,
+				row_names=[] if qty_sign else print_order_row_names, validate_row_names=print_order_row_names)
+
+	def update_textile_order_ordered_qty(self, qty_sign):
+		# Ordered Qty is changed by the submitted or cancelled quantity, order status is derived from the stored values
+		pretreatment_order_qty = {}
+		print_order_item_qty = {}
+
+		for d in self.items:
+			if d.get('pretreatment_order'):
+				pretreatment_order_qty.setdefault(d.pretreatment_order, 0)
+				pretreatment_order_qty[d.pretreatment_order] += qty_sign * flt(d.stock_qty)
+			if d.get('print_order_item'):
+				print_order_item_qty.setdefault(d.print_order_item, 0)
+				print_order_item_qty[d.print_order_item] += qty_sign * flt(d.stock_qty)
+
+		update_order_qty("Pretreatment Order", "ordered_qty", pretreatment_order_qty)
+		update_order_qty("Print Order Item", "ordered_qty", print_order_item_qty)
 
 	def update_status(self, status):
 		super().update_status(status)
 
 		pretreatment_orders = set([d.pretreatment_order for d in self.items if d.get('pretreatment_order')])
 		for name in pretreatment_orders:
-			doc = frappe.get_doc("Pretreatment Order", name)
+			doc = get_order_for_status_update("Pretreatment Order", name)
 			doc.run_method("update_status", None)
 
 		print_orders = set([d.print_order for d in self.items if d.get('print_order')])
 		for name in print_orders:
-			doc = frappe.get_doc("Print Order", name)
+			doc = get_order_for_status_update("Print Order", name)
 			doc.run_method("update_status", None)
 
 	def get_sales_order_item_bom(self, row):
@@ -3,6 +3,10 @@ from frappe import _
 from frappe.utils import flt
 from erpnext.stock.doctype.stock_entry.stock_entry import StockEntry
 from erpnext.stock.get_item_details import get_conversion_factor
+from textile.controllers.order_status_updater import (
+	queue_order_status_update, update_order_qty, get_qty_sign,
+	get_order_for_status_update
+)
 
 
 class StockEntryDP(StockEntry):
@@ -61,16 +65,13 @@ class StockEntryDP(StockEntry):
 		if self.get("work_order"):
 			return
 
-		if not frappe.flags.skip_print_order_status_update:
-			print_order = frappe.get_doc("Print Order", self.print_order)
-			print_order.set_fabric_transfer_status(update=True)
-			print_order.notify_update()
+		queue_order_status_update("Print Order", self.print_order, ["set_fabric_transfer_status"])
 
 	def update_coating_order(self, validate_coating_order_qty=False):
 		if not self.coating_order:
 			return
 
-		coating_order_doc = frappe.get_doc("Coating Order", self.coating_order)
+		coating_order_doc = get_order_for_status_update("Coating Order", self.coating_order)
 
 		if coating_order_doc.docstatus != 1:
 			frappe.throw(_("Coating Order {0} must be submitted").format(self.coating_order))
@@ -78,7 +79,13 @@ class StockEntryDP(StockEntry):
 		if coating_order_doc.status == 'Stopped':
 			frappe.throw(_("Transaction not allowed against stopped Coating Order {0}").format(self.coating_order))
 
-		coating_order_doc.set_coating_status(update=True)
+		# Manufactured quantity is added or removed instead of aggregating all Stock Entries
+		qty_sign = get_qty_sign(self)
+		if qty_sign and self.purpose == "Manufacture":
+			update_order_qty("Coating Order", "coated_qty", {self.coating_order: qty_sign * flt(self.fg_completed_qty)})
+			coating_order_doc.coated_qty = frappe.db.get_value("Coating Order", self.coating_order, "coated_qty")
+
+		coating_order_doc.set_coating_status(update=True, use_stored_qty=bool(qty_sign))
 
 		if validate_coating_order_qty:
 			coating_order_doc.validate_coating_order_qty(from_doctype=self.doctype)
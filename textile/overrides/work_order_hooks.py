@@ -1,6 +1,8 @@
 import frappe
 from frappe.utils import flt, cint
 from erpnext.manufacturing.doctype.work_order.work_order import WorkOrder
+from erpnext.manufacturing.doctype.work_order.work_order import get_subcontractable_qty
+from textile.controllers.order_status_updater import queue_order_status_update, update_order_qty, get_qty_sign
 
 
 warehouse_fields = ['fabric_warehouse', 'source_warehouse', 'wip_warehouse', 'fg_warehouse']
@@ -12,41 +14,49 @@ greige_fabric_fields = ["greige_" + f for f in fabric_fields]
 class WorkOrderDP(WorkOrder):
 	def on_submit(self):
 		super().on_submit()
-		self.update_pretreatment_order(validate_work_order_qty=True)
-		self.update_print_order(validate_work_order_qty=True)
+		self.update_pretreatment_order(validate_work_order_qty=True, qty_sign=get_qty_sign(self))
+		self.update_print_order(validate_work_order_qty=True, qty_sign=get_qty_sign(self))
 
 	def on_cancel(self):
 		super().on_cancel()
-		self.update_pretreatment_order()
-		self.update_print_order()
+		self.update_pretreatment_order(qty_sign=get_qty_sign(self))
+		self.update_print_order(qty_sign=get_qty_sign(self))
 
 	def update_status(self, status=False, from_doctype=None):
 		super().update_status(status, from_doctype)
 		self.update_pretreatment_order()
 		self.update_print_order()
 
-	def update_pretreatment_order(self, validate_work_order_qty=False):
-		if self.get('pretreatment_order') and not frappe.flags.skip_pretreatment_order_status_update:
-			doc = frappe.get_doc("Pretreatment Order", self.pretreatment_order)
-			doc.set_production_packing_status(update=True)
-
-			if validate_work_order_qty:
-				doc.validate_work_order_qty(from_doctype=self.doctype)
-
-			doc.set_status(update=True)
-			doc.notify_update()
-
-	def update_print_order(self, validate_work_order_qty=False):
-		if self.get('print_order') and self.get('print_order_item') and not frappe.flags.skip_print_order_status_update:
-			doc = frappe.get_doc("Print Order", self.print_order)
-			doc.set_production_packing_status(update=True)
-
-			if validate_work_order_qty:
-				doc.validate_work_order_qty(from_doctype=self.doctype,
-					row_names=[self.print_order_item])
-
-			doc.set_status(update=True)
-			doc.notify_update()
+	def update_pretreatment_order(self, validate_work_order_qty=False, qty_sign=None):
+		if self.get('pretreatment_order'):
+			# Work Order Qty is changed by the submitted or cancelled quantity instead of aggregating all Work Orders
+			if qty_sign:
+				subcontractable_qty = max(get_subcontractable_qty(
+					self.producible_qty,
+					self.material_transferred_for_manufacturing,
+					self.produced_qty,
+					self.scrap_qty
+				), 0)
+
+				update_order_qty("Pretreatment Order", "work_order_qty", {self.pretreatment_order: qty_sign * flt(self.qty)})
+				update_order_qty("Pretreatment Order", "subcontractable_qty",
+					{self.pretreatment_order: qty_sign * flt(subcontractable_qty)})
+
+			queue_order_status_update("Pretreatment Order", self.pretreatment_order,
+				["set_production_packing_status", "update_order_progress"],
+				validate_methods=["validate_work_order_qty"] if validate_work_order_qty else None,
+				from_doctype=self.doctype, row_names=[] if qty_sign else [self.pretreatment_order],
+				validate_row_names=[self.pretreatment_order])
+
+	def update_print_order(self, validate_work_order_qty=False, qty_sign=None):
+		if self.get('print_order') and self.get('print_order_item'):
+			if qty_sign:
+				update_order_qty("Print Order Item", "work_order_qty", {self.print_order_item: qty_sign * flt(self.qty)})
+
+			queue_order_status_update("Print Order", self.print_order, ["set_production_packing_status"],
+				validate_methods=["validate_work_order_qty"] if validate_work_order_qty else None,
+				from_doctype=self.doctype, row_names=[] if qty_sign else [self.print_order_item],
+				validate_row_names=[self.print_order_item])
 
 	def set_required_items(self, reset_only_qty=False):
 		super().set_required_items(reset_only_qty)
@@ -66,6 +76,12 @@ class WorkOrderDP(WorkOrder):
 					d.source_warehouse = order.fabric_warehouse
 
 
+def on_work_order_update_after_submit(doc, method):
+	# Operation progress from Job Cards is saved to the Work Order after submit
+	if doc.get('pretreatment_order'):
+		queue_order_status_update("Pretreatment Order", doc.pretreatment_order, ["update_order_progress"])
+
+
 def update_work_order_on_create(work_order, args=None):
 	if args and args.get("pretreatment_order"):
 		work_order.pretreatment_order = args.get("pretreatment_order")
@@ -75,7 +91,7 @@ def update_work_order_on_create(work_order, args=None):
 		work_order.print_order_item = args.get("print_order_item")
 
 	# Set Order Reference
-	if work_order.get('sales_order_item'):
+	if work_order.get('sales_order_item') and not (work_order.get('print_order') or work_order.get('pretreatment_order')):
 		so_item = frappe.db.get_value("Sales Order Item", work_order.sales_order_item,
 			["pretreatment_order", "print_order", "print_order_item"], as_dict=1)
 		if so_item:
@@ -120,19 +136,30 @@ def update_work_order_on_create(work_order, args=None):
 			work_order.set(field, print_order_details.get(field))
 
 	# Set max qty
-	if work_order.get('print_order_item'):
+	if work_order.get('print_order_item') and args and args.get("max_qty") is not None:
+		work_order.max_qty = flt(args.get("max_qty"))
+	elif work_order.get('print_order_item'):
 		work_order.max_qty = flt(frappe.db.get_value("Print Order Item", work_order.print_order_item,
 			"stock_fabric_length", cache=1))
 
 
-def get_pretreatment_order_details(pretreatment_order):
-	fields = ["packing_slip_required", "delivery_required"] + greige_fabric_fields + warehouse_fields
-	return frappe.db.get_value("Pretreatment Order", pretreatment_order, fields, as_dict=1)
+def get_pretreatment_order_details(pretreatment_order, order_doc=None):
+	def generator():
+		fields = ["packing_slip_required", "delivery_required"] + greige_fabric_fields + warehouse_fields
+		if order_doc:
+			return frappe._dict({f: order_doc.get(f) for f in fields})
+
+		return frappe.db.get_value("Pretreatment Order", pretreatment_order, fields, as_dict=1)
+
+	return frappe.local_cache("pretreatment_order_details_wo", pretreatment_order, generator)
 
 
-def get_print_order_details(print_order):
+def get_print_order_details(print_order, order_doc=None):
 	def generator():
 		fields = ["packing_slip_required", "is_internal_customer", "skip_transfer"] + fabric_fields + print_process_fields + warehouse_fields
+		if order_doc:
+			return frappe._dict({f: order_doc.get(f) for f in fields})
+
 		return frappe.db.get_value("Print Order", print_order, fields, as_dict=1)
 
 	return frappe.local_cache("print_order_details_wo_from_so", print_order, generator)
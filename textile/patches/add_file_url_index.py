@@ -0,0 +1,5 @@
+from textile.install import add_file_url_index
+
+
+def execute():
+	add_file_url_index()
@@ -5,141 +5,631 @@ from frappe.core.doctype.file.utils import get_local_image
 from frappe.utils.user import is_website_user
 from frappe.core.doctype.file.utils import delete_file
 from werkzeug.utils import send_file
-import io
+from werkzeug.wrappers import Response
+from collections import OrderedDict
+from contextlib import contextmanager
+from urllib.parse import quote
+import threading
+import warnings
+import struct
+import time
+import math
 import os
+import io
 import mimetypes
 
 
+rendition_fields = {
+	"rotated": "rotated_image",
+	"small": "preview_small",
+	"medium": "preview_medium",
+	"large": "preview_large",
+}
+
+preview_sizes = {
+	"preview_small": 150,
+	"preview_medium": 600,
+	"preview_large": 1200,
+}
+
+rendition_doctypes = ("Print Order", "Item")
+
+# In process cache of file_url -> file id, privacy and rendition urls
+rendition_cache = OrderedDict()
+rendition_cache_lock = threading.Lock()
+rendition_cache_size = 4096
+rendition_cache_ttl = 300
+
+rendition_max_retries = 3
+rendition_retry_expiry = 24 * 60 * 60
+
+# Pillow's decompression bomb limit while opening rendition sources, decoding is bounded by rendition_memory_limit
+rendition_max_image_pixels = 1024 * 1024 * 1024
+pixel_limit_lock = threading.Lock()
+
+# Samples per pixel and photometric interpretation of TIFF modes that can be read in bands
+tiff_band_modes = {"L": 1, "RGB": 3, "CMYK": 4}
+tiff_band_photometrics = {"L": 1, "RGB": 2, "CMYK": 5}
+# None, LZW, Adobe Deflate, PackBits and Deflate
+tiff_band_compressions = (1, 5, 8, 32773, 32946)
+# Bytes of source rows decoded at once
+tiff_band_size = 16 * 1024 * 1024
+
+
 @frappe.whitelist()
-def get_rotated_image(file, get_path=False):
+def get_rotated_image(file, get_path=False, rendition="rotated"):
 	if not file:
 		frappe.throw(_("File URL not provided"))
 
-	file_id = get_file_id(file)
-	if not file_id:
-		raise frappe.DoesNotExistError
+	rendition_field = rendition_fields.get(rendition)
+	if not rendition_field:
+		frappe.throw(_("Invalid rendition {0}").format(rendition))
 
-	file_doc = frappe.get_doc("File", file_id)
-	if file_doc.is_private and is_website_user():
-		file_doc.raise_no_permission_to("read")
+	file_info = get_file_rendition_info(file)
+	if not file_info:
+		raise frappe.DoesNotExistError
 
-	rotated_image_url = get_rotated_image_url(file)
+	if file_info.is_private and is_website_user():
+		raise frappe.PermissionError
 
-	if rotated_image_url and os.path.isfile(get_file_path(rotated_image_url)):
-		rotated_file_path = get_file_path(rotated_image_url)
-		rotated_filename = os.path.basename(rotated_file_path)
-		output = open(rotated_file_path, "rb")
-	else:
-		rotated_filename, rotated_image_url, output = save_rotated_image_file(file, file_doc)
+	rendition_url = file_info.renditions.get(rendition_field)
+	if not rendition_url or not os.path.isfile(get_file_path(rendition_url)):
+		clear_rendition_cache(file)
+		if cint(get_path):
+			# Called from background jobs, build it right away
+			rendition_url = make_file_renditions(file_info.file_id).get(rendition_field)
+		else:
+			enqueue_file_renditions(frappe.get_doc("File", file_info.file_id), commit=True, retry_failed=True)
+			return get_placeholder_response()
 
 	if cint(get_path):
-		return rotated_image_url
+		return rendition_url
+	else:
+		return get_rendition_response(rendition_url, file_info.is_private)
+
+
+def get_rendition_response(rendition_url, is_private):
+	rendition_file_path = os.path.abspath(get_file_path(rendition_url))
+	rendition_filename = os.path.basename(rendition_file_path)
+	mimetype = mimetypes.guess_type(rendition_filename)[0] or "image/jpeg"
+	max_age = cint(frappe.conf.get("rendition_cache_max_age", 3600))
+
+	# Let the web server stream the file
+	request_headers = frappe.local.request.headers
+	if request_headers.get("X-Use-X-Accel-Redirect"):
+		response = Response(mimetype=mimetype)
+		response.headers["X-Accel-Redirect"] = quote(frappe.utils.encode("/protected/" + get_site_relative_path(rendition_url)))
+		response.cache_control.max_age = max_age
+	elif request_headers.get("X-Use-X-Sendfile"):
+		response = Response(mimetype=mimetype)
+		response.headers["X-Sendfile"] = rendition_file_path
+		response.cache_control.max_age = max_age
 	else:
-		return send_file(
-			output,
+		response = send_file(
+			rendition_file_path,
 			environ=frappe.local.request.environ,
-			mimetype=mimetypes.guess_type(rotated_filename)[0] or "image/jpeg",
-			download_name=rotated_filename,
+			mimetype=mimetype,
+			download_name=rendition_filename,
+			conditional=True,
+			etag=True,
+			max_age=max_age,
 		)
 
+	if is_private:
+		response.cache_control.public = False
+		response.cache_control.private = True
 
-def get_file_id(file_url):
+	return response
+
+
+def get_placeholder_response():
+	placeholder_path = frappe.get_app_path("textile", "public", "images", "rendition_placeholder.svg")
+	response = send_file(
+		open(placeholder_path, "rb"),
+		environ=frappe.local.request.environ,
+		mimetype="image/svg+xml",
+		download_name="rendition_placeholder.svg",
+	)
+	response.cache_control.no_store = True
+	return response
+
+
+def get_file_rendition_info(file_url):
+	cache_key = (frappe.local.site, file_url)
+
+	with rendition_cache_lock:
+		file_info = rendition_cache.get(cache_key)
+		if file_info and file_info.expires_on > time.monotonic():
+			rendition_cache.move_to_end(cache_key)
+			return file_info
+
+	file_info = get_file_rendition_info_from_db(file_url)
+
+	# Only cache once all renditions are built
+	if file_info and all(file_info.renditions.get(rendition_field) for rendition_field in rendition_fields.values()):
+		file_info.expires_on = time.monotonic() + rendition_cache_ttl
+		with rendition_cache_lock:
+			rendition_cache[cache_key] = file_info
+			while len(rendition_cache) > rendition_cache_size:
+				rendition_cache.popitem(last=False)
+
+	return file_info
+
+
+def get_file_rendition_info_from_db(file_url):
 	files = frappe.db.sql("""
-		select name, file_url
+		select name, file_url, is_private, {0}
 		from `tabFile`
 		where file_url = %s
 		order by if(attached_to_doctype = 'Print Order', 0, 1), creation
-	""", file_url, as_dict=1)
+	""".format(", ".join(rendition_fields.values())), file_url, as_dict=1)
 
-	file_id = None
+	file_info = None
 	for d in files:
-		if d.file_url == file_url:
-			file_id = d.name
-			break
+		if d.file_url != file_url:
+			continue
+
+		if not file_info:
+			file_info = frappe._dict({
+				"file_id": d.name,
+				"is_private": cint(d.is_private),
+				"renditions": {},
+			})
+
+		for rendition_field in rendition_fields.values():
+			if d.get(rendition_field) and not file_info.renditions.get(rendition_field):
+				file_info.renditions[rendition_field] = d.get(rendition_field)
 
-	return file_id
+	return file_info
 
 
-def get_rotated_image_url(file_url):
+def clear_rendition_cache(file_url):
+	with rendition_cache_lock:
+		rendition_cache.pop((frappe.local.site, file_url), None)
+
+
+def get_rendition_urls(file_url):
 	files = frappe.get_all("File", filters={
-		"file_url": file_url, "rotated_image": ["is", "set"]
-	}, fields=["file_url", "rotated_image"])
+		"file_url": file_url,
+	}, fields=["file_url"] + list(rendition_fields.values()), order_by="creation")
 
-	rotated_image_url = None
+	out = {}
 	for d in files:
-		if d.file_url == file_url:
-			rotated_image_url = d.rotated_image
-			break
+		if d.file_url != file_url:
+			continue
+
+		for rendition_field in rendition_fields.values():
+			if d.get(rendition_field) and not out.get(rendition_field):
+				out[rendition_field] = d.get(rendition_field)
+
+	return out
+
+
+def on_file_insert(doc, method=None):
+	if doc.attached_to_doctype in rendition_doctypes and is_image_file(doc.file_url):
+		enqueue_file_renditions(doc)
+
+
+def is_image_file(file_url):
+	mimetype = mimetypes.guess_type(file_url or "")[0]
+	return bool(mimetype and mimetype.startswith("image/"))
+
+
+def enqueue_file_renditions(file_doc, commit=False, retry_failed=False):
+	if file_doc.get("rendition_status") == "Failed":
+		if not retry_failed or not can_retry_file_renditions(file_doc.name):
+			return
+
+	if file_doc.get("rendition_status") != "Queued":
+		file_doc.db_set("rendition_status", "Queued", update_modified=False)
+		if commit:
+			frappe.db.commit()
+
+	frappe.enqueue(
+		"textile.rotated_image.make_file_renditions",
+		file_name=file_doc.name,
+		queue="long",
+		timeout=1500,
+		job_id=f"file_renditions::{file_doc.name}",
+		deduplicate=True,
+		enqueue_after_commit=not commit,
+		commit=True,
+	)
+
+
+def can_retry_file_renditions(file_name):
+	# Failed renditions are retried a few times a day when requested again in case the failure was transient
+	retry_key = f"file_rendition_retries::{file_name}"
+	retries = cint(frappe.cache().get_value(retry_key))
+	if retries >= rendition_max_retries:
+		return False
+
+	frappe.cache().set_value(retry_key, retries + 1, expires_in_sec=rendition_retry_expiry)
+	return True
+
+
+def enqueue_renditions_for_files(file_names):
+	if not file_names:
+		return
+
+	frappe.enqueue(
+		"textile.rotated_image.make_renditions_for_files",
+		file_names=file_names,
+		queue="long",
+		timeout=max(1500, len(file_names) * 60),
+		enqueue_after_commit=True,
+	)
+
+
+def make_renditions_for_files(file_names):
+	for file_name in file_names:
+		make_file_renditions(file_name, commit=True)
+
+
+def make_file_renditions(file_name, commit=False):
+	# Transactions are only committed as a background job, inline calls leave the caller's transaction as is
+	file_doc = frappe.get_doc("File", file_name)
+
+	save_point = "file_renditions"
+	if not commit:
+		frappe.db.savepoint(save_point)
+
+	file_doc.db_set("rendition_status", "In Progress", update_modified=False)
 
-	return rotated_image_url
+	try:
+		renditions = get_rendition_urls(file_doc.file_url)
+		if not all(
+			renditions.get(rendition_field) and os.path.isfile(get_file_path(renditions.get(rendition_field)))
+			for rendition_field in rendition_fields.values()
+		):
+			renditions = save_file_renditions(file_doc)
+	except Exception:
+		if commit:
+			frappe.db.rollback()
+		else:
+			frappe.db.rollback(save_point=save_point)
 
+		file_doc.db_set("rendition_status", "Failed", update_modified=False)
+		file_doc.log_error(_("Failed to create image renditions"))
+		if commit:
+			frappe.db.commit()
+		return {}
 
-def save_rotated_image_file(file, file_doc):
-	rotated_filename, output = make_rotated_image(file)
+	renditions["rendition_status"] = "Completed"
+	file_doc.db_set(renditions, update_modified=False)
+	if commit:
+		frappe.db.commit()
+	clear_rendition_cache(file_doc.file_url)
 
+	return renditions
+
+
+def save_file_renditions(file_doc):
+	with raised_pixel_limit(rendition_max_image_pixels):
+		source_image, original_filename, ext = get_local_image(file_doc.file_url)
+
+	image_format = source_image.format or "jpeg"
+	filename = original_filename.split("/")[-1]
+
+	# Decoding is bounded by the rendition memory limit
+	working_image = get_working_image(source_image)
+
+	out = {}
+	for rendition_field, size in preview_sizes.items():
+		preview_image = working_image.copy()
+		preview_image.thumbnail((size, size))
+		out[rendition_field] = save_rendition_file(preview_image, file_doc, f"{filename}_{rendition_field}.{ext}",
+			image_format)
+
+	out["rotated_image"] = save_rendition_file(make_rotated_image(working_image), file_doc,
+		f"{filename}_rotated.{ext}", image_format)
+
+	return out
+
+
+@contextmanager
+def raised_pixel_limit(max_pixels):
+	# Pillow's pixel limit is a module global, so it is only raised while the source image is being opened
+	from PIL import Image
+
+	with pixel_limit_lock:
+		previous_limit = Image.MAX_IMAGE_PIXELS
+		if previous_limit is not None:
+			Image.MAX_IMAGE_PIXELS = max(previous_limit, max_pixels)
+
+		try:
+			with warnings.catch_warnings():
+				warnings.simplefilter("ignore", Image.DecompressionBombWarning)
+				yield
+		finally:
+			Image.MAX_IMAGE_PIXELS = previous_limit
+
+
+def get_working_image(source_image, memory_limit=None):
+	# Downscale to the smallest size all renditions can be derived from
+	width, height = source_image.size
+	scale = min(1, max(300 / width, max(preview_sizes.values()) / max(width, height)))
+	target_size = (math.ceil(width * scale), math.ceil(height * scale))
+
+	working_image = load_reduced_image(source_image, target_size, memory_limit=memory_limit)
+	working_image.thumbnail(target_size)
+
+	return working_image
+
+
+def load_reduced_image(image, target_size, memory_limit=None):
+	# Decode the image at the smallest resolution the decoder can provide for target_size
+	if memory_limit is None:
+		memory_limit = get_rendition_memory_limit()
+
+	if image.format == "JPEG":
+		# DCT scaling at decode time by 1/2, 1/4 or 1/8
+		image.draft(None, target_size)
+
+	elif image.format == "TIFF":
+		image = seek_tiff_page(image, target_size)
+
+		reduced_image = load_tiff_in_bands(image, target_size, memory_limit)
+		if reduced_image:
+			return reduced_image
+
+	decode_size = get_decode_memory(image.mode, image.size)
+	if memory_limit and decode_size > memory_limit:
+		frappe.throw(_("Image of {0}x{1} pixels requires {2} MB to decode which is over the limit of {3} MB").format(
+			image.size[0], image.size[1], cint(decode_size / 1024 / 1024), cint(memory_limit / 1024 / 1024)
+		))
+
+	image.load()
+	return image
+
+
+def seek_tiff_page(image, target_size):
+	# Pick the smallest page of a pyramidal TIFF that is still larger than target size
+	n_frames = getattr(image, "n_frames", 1)
+	if n_frames <= 1:
+		return image
+
+	width, height = image.size
+	selected_page = 0
+	selected_size = image.size
+
+	for page in range(1, n_frames):
+		image.seek(page)
+		page_width, page_height = image.size
+
+		is_same_aspect_ratio = abs(page_width / page_height - width / height) < 0.01 * width / height
+		is_large_enough = page_width >= target_size[0] and page_height >= target_size[1]
+		if is_same_aspect_ratio and is_large_enough and page_width < selected_size[0]:
+			selected_page = page
+			selected_size = image.size
+
+	image.seek(selected_page)
+	return image
+
+
+def load_tiff_in_bands(image, target_size, memory_limit):
+	# Strips or tiles are decoded one band of rows at a time and reduced immediately
+	factor = min(image.size[0] // target_size[0], image.size[1] // target_size[1])
+	if factor < 2 or image.mode not in tiff_band_modes or not getattr(image, "filename", None):
+		return None
+
+	from PIL import Image
+
+	width, height = image.size
+	stride = width * tiff_band_modes[image.mode]
+
+	band_size = min(tiff_band_size, memory_limit / 4) if memory_limit else tiff_band_size
+	max_band_rows = max(factor, cint(band_size / stride))
+	chunks = get_tiff_chunks(image, max(1, max_band_rows // 4))
+	if not chunks:
+		return None
+
+	# A band must hold the tallest strip or tile plus the rows carried over from the previous band
+	band_rows = max(max_band_rows, max(chunk[3] for chunk in chunks) + factor)
+	if memory_limit and band_rows * stride > memory_limit / 2:
+		return None
+
+	reduced_image = Image.new(image.mode, (math.ceil(width / factor), math.ceil(height / factor)))
+	band_image = Image.new(image.mode, (width, band_rows))
+	band_top = 0
+
+	with open(image.filename, "rb") as f:
+		for left, top, chunk_width, chunk_height, offset, byte_count in chunks:
+			if top + chunk_height - band_top > band_rows:
+				# Reduce the complete rows above this chunk and move the remaining rows to the top of the band
+				reduced_rows = (top - band_top) - (top - band_top) % factor
+				reduced_image.paste(band_image.reduce(factor, box=(0, 0, width, reduced_rows)), (0, band_top // factor))
+
+				band_image.paste(band_image.crop((0, reduced_rows, width, top - band_top)), (0, 0))
+				band_top += reduced_rows
+
+			f.seek(offset)
+			chunk_image = decode_tiff_chunk(image, (chunk_width, chunk_height), f.read(byte_count))
+			band_image.paste(chunk_image, (left, top - band_top))
+
+	reduced_image.paste(band_image.reduce(factor, box=(0, 0, width, height - band_top)), (0, band_top // factor))
+	return reduced_image
+
+
+def get_tiff_chunks(image, max_rows):
+	# Returns (left, top, width, height, file offset, byte count) of each strip or tile of an 8 bit TIFF page
+	tags = image.tag_v2
+	bits_per_sample = get_tiff_tag_values(tags, 258) or (1,)
+	sample_format = get_tiff_tag_values(tags, 339) or (1,)
+	compression = tags.get(259, 1)
+
+	if (
+		compression not in tiff_band_compressions
+		or tags.get(262) != tiff_band_photometrics[image.mode]
+		or tags.get(266, 1) != 1  # fill order
+		or tags.get(274, 1) != 1  # orientation
+		or tags.get(284, 1) != 1  # planar configuration
+		or set(bits_per_sample) != {8}
+		or set(sample_format) != {1}
+	):
+		return None
+
+	width, height = image.size
+
+	if 322 in tags:
+		tile_width = cint(tags.get(322))
+		tile_height = cint(tags.get(323))
+		offsets = get_tiff_tag_values(tags, 324)
+		byte_counts = get_tiff_tag_values(tags, 325)
+		if not tile_width or not tile_height:
+			return None
+
+		tiles_across = math.ceil(width / tile_width)
+		if len(offsets) != tiles_across * math.ceil(height / tile_height) or len(offsets) != len(byte_counts):
+			return None
+
+		return [
+			((i % tiles_across) * tile_width, (i // tiles_across) * tile_height, tile_width, tile_height, offset, byte_counts[i])
+			for i, offset in enumerate(offsets)
+		]
+
+	rows_per_strip = min(cint(tags.get(278)) or height, height)
+	offsets = get_tiff_tag_values(tags, 273)
+	byte_counts = get_tiff_tag_values(tags, 279)
+	if len(offsets) != math.ceil(height / rows_per_strip) or len(offsets) != len(byte_counts):
+		return None
+
+	stride = width * tiff_band_modes[image.mode]
+
+	chunks = []
+	for i, offset in enumerate(offsets):
+		top = i * rows_per_strip
+		bottom = min(top + rows_per_strip, height)
+
+		if compression != 1:
+			chunks.append((0, top, width, bottom - top, offset, byte_counts[i]))
+			continue
+
+		# Uncompressed strips are split into fewer rows as the rows are fixed size
+		if byte_counts[i] < (bottom - top) * stride:
+			return None
+
+		for part_top in range(top, bottom, max_rows):
+			part_bottom = min(part_top + max_rows, bottom)
+			chunks.append((0, part_top, width, part_bottom - part_top, offset + (part_top - top) * stride,
+				(part_bottom - part_top) * stride))
+
+	return chunks
+
+
+def decode_tiff_chunk(image, size, data):
+	# Compressed strips or tiles are wrapped in a minimal TIFF so that Pillow decodes them with the page's compression
+	from PIL import Image
+
+	tags = image.tag_v2
+	if tags.get(259, 1) == 1:
+		return Image.frombytes(image.mode, size, data)
+
+	samples_per_pixel = tiff_band_modes[image.mode]
+
+	# (tag, field type, values) where field type 3 is SHORT and 4 is LONG
+	entries = [
+		(256, 4, (size[0],)),
+		(257, 4, (size[1],)),
+		(258, 3, (8,) * samples_per_pixel),
+		(259, 3, (tags.get(259, 1),)),
+		(262, 3, (tags.get(262),)),
+		(273, 4, (8,)),
+		(277, 3, (samples_per_pixel,)),
+		(278, 4, (size[1],)),
+		(279, 4, (len(data),)),
+		(317, 3, (tags.get(317, 1),)),  # predictor
+	]
+
+	ifd_offset = 8 + len(data) + len(data) % 2
+	extra_offset = ifd_offset + 2 + len(entries) * 12 + 4
+
+	ifd = struct.pack("<H", len(entries))
+	extra = b""
+	for tag, field_type, values in entries:
+		value = struct.pack("<{0}{1}".format(len(values), "H" if field_type == 3 else "I"), *values)
+		if len(value) > 4:
+			ifd += struct.pack("<HHII", tag, field_type, len(values), extra_offset + len(extra))
+			extra += value
+		else:
+			ifd += struct.pack("<HHI", tag, field_type, len(values)) + value.ljust(4, b"\0")
+
+	ifd += struct.pack("<I", 0)
+
+	tiff_data = struct.pack("<2sHI", b"II", 42, ifd_offset) + data + b"\0" * (len(data) % 2) + ifd + extra
+
+	chunk_image = Image.open(io.BytesIO(tiff_data))
+	chunk_image.load()
+	return chunk_image
+
+
+def get_tiff_tag_values(tags, tag):
+	values = tags.get(tag)
+	if values is None:
+		return ()
+
+	return tuple(values) if isinstance(values, (tuple, list)) else (values,)
+
+
+def get_decode_memory(mode, size):
+	bytes_per_pixel = {"1": 1, "L": 1, "P": 1, "I;16": 2, "I;16B": 2, "I;16L": 2}.get(mode, 4)
+	return size[0] * size[1] * bytes_per_pixel
+
+
+def get_rendition_memory_limit():
+	return cint(frappe.db.get_single_value("Fabric Printing Settings", "rendition_memory_limit")) * 1024 * 1024
+
+
+def save_rendition_file(image, file_doc, rendition_filename, image_format):
 	path = os.path.abspath(frappe.get_site_path(
 		"private" if file_doc.is_private else "public",
 		"files",
-		rotated_filename.lstrip("/"))
+		rendition_filename.lstrip("/"))
 	)
 
-	with open(path, "wb") as f:
-		f.write(output.getbuffer())
-		output.seek(0)
+	image.save(path, format=image_format, quality=70)
 
 	if file_doc.is_private:
-		rotated_image_url = "/private/files/" + rotated_filename
+		return "/private/files/" + rendition_filename
 	else:
-		rotated_image_url = "/files/" + rotated_filename
-
-	file_doc.db_set("rotated_image", rotated_image_url)
-	frappe.db.commit()
+		return "/files/" + rendition_filename
 
-	return rotated_filename, rotated_image_url, output
 
-
-def make_rotated_image(file):
+def make_rotated_image(image):
 	angle = 90
 	view_height = 150
 
-	original_image, original_filename, ext = get_local_image(file)
-	image_format = original_image.format
-
-	scaling_factor = view_height / original_image.width
-	width = original_image.height * scaling_factor
+	scaling_factor = view_height / image.width
+	width = image.height * scaling_factor
 
 	height = cint(view_height * 2)
 	width = cint(width * 2)
 
-	original_image.thumbnail((height, width))
+	rotated_image = image.copy()
+	rotated_image.thumbnail((height, width))
 
-	modified_image = original_image.rotate(angle, expand=True)
+	return rotated_image.rotate(angle, expand=True)
 
-	rotated_filename = original_filename.split("/")[-1]
-	rotated_filename = f"{rotated_filename}_rotated.{ext}"
 
-	output = io.BytesIO()
-	modified_image.save(
-		output,
-		format=image_format or "jpeg",
-		quality=70,
-	)
-	output.seek(0)
-
-	return rotated_filename, output
+def get_file_path(file_url):
+	return frappe.get_site_path(get_site_relative_path(file_url))
 
 
-def get_file_path(file_url):
+def get_site_relative_path(file_url):
 	if file_url.startswith("/private"):
-		file_url_path = (file_url.lstrip("/"),)
+		return file_url.lstrip("/")
 	else:
-		file_url_path = ("public", file_url.lstrip("/"))
-
-	file_path = frappe.get_site_path(*file_url_path)
-	return file_path
+		return "public/" + file_url.lstrip("/")
 
 
 def delete_file_data_content(doc, only_thumbnail=False):
 	doc.delete_file_from_filesystem(only_thumbnail=only_thumbnail)
-	if doc.rotated_image:
-		delete_file(doc.rotated_image)
+	clear_rendition_cache(doc.file_url)
+
+	# Renditions are shared between File records with the same file url
+	if frappe.db.exists("File", {"file_url": doc.file_url, "name": ["!=", doc.name]}):
+		return
+
+	for rendition_field in rendition_fields.values():
+		if doc.get(rendition_field):
+			delete_file(doc.get(rendition_field))
@@ -0,0 +1,108 @@
+# Copyright (c) 2026, ParaLogic and Contributors
+# See license.txt
+
+import os
+import subprocess
+import sys
+import tempfile
+from frappe.tests.utils import FrappeTestCase
+from PIL import Image, ImageDraw
+
+
+# Peak resident memory of the process, ru_maxrss is not used as it keeps the parent's peak across exec
+measure_script = """
+import sys
+
+def get_peak_memory():
+	with open("/proc/self/status") as f:
+		return int([line.split()[1] for line in f if line.startswith("VmHWM:")][0])
+
+before = get_peak_memory()
+
+from PIL import Image
+from textile.rotated_image import get_working_image, raised_pixel_limit, rendition_max_image_pixels
+
+if sys.argv[1] != "baseline":
+	Image.MAX_IMAGE_PIXELS = int(sys.argv[3])
+	with raised_pixel_limit(rendition_max_image_pixels):
+		image = Image.open(sys.argv[1])
+
+	working_image = get_working_image(image, memory_limit=int(sys.argv[2]))
+	size = working_image.size
+else:
+	size = (0, 0)
+
+print(get_peak_memory() - before, size[0], size[1])
+"""
+
+
+class TestRotatedImage(FrappeTestCase):
+	width = 12000
+	height = 8000
+	memory_limit = 16 * 1024 * 1024
+
+	def make_synthetic_image(self, path, **save_kwargs):
+		image = Image.new("L", (self.width, self.height), 128)
+		draw = ImageDraw.Draw(image)
+		for x in range(0, self.width, 500):
+			draw.line((x, 0, self.width - x, self.height), fill=255, width=20)
+
+		image.save(path, **save_kwargs)
+
+	def get_peak_memory_increase(self, path, max_image_pixels):
+		def measure(path):
+			output = subprocess.check_output([sys.executable, "-c", measure_script, path, str(self.memory_limit),
+				str(max_image_pixels)])
+			peak_kb, width, height = [int(v) for v in output.split()]
+			return peak_kb * 1024, (width, height)
+
+		# Imports are measured by a baseline run and excluded
+		baseline_peak, _ = measure("baseline")
+		peak, size = measure(path)
+		return peak - baseline_peak, size
+
+	def assert_bounded_memory(self, path, max_image_pixels=Image.MAX_IMAGE_PIXELS):
+		full_decode_size = self.width * self.height
+		peak_increase, size = self.get_peak_memory_increase(path, max_image_pixels)
+
+		self.assertEqual(size, (1200, 800))
+		self.assertLess(peak_increase, full_decode_size / 4)
+
+	def test_jpeg_draft_decoding(self):
+		with tempfile.TemporaryDirectory() as tmpdir:
+			path = os.path.join(tmpdir, "design.jpg")
+			self.make_synthetic_image(path, format="JPEG", quality=80)
+			self.assert_bounded_memory(path)
+
+	def test_tiff_band_decoding(self):
+		with tempfile.TemporaryDirectory() as tmpdir:
+			path = os.path.join(tmpdir, "design.tif")
+			self.make_synthetic_image(path, format="TIFF")
+			self.assert_bounded_memory(path)
+
+	def test_lzw_tiff_over_pixel_limit(self):
+		# Lower the pixel limit so that the design is over twice the limit, as a 30000x12000 design would be
+		max_image_pixels = self.width * self.height // 4
+
+		with tempfile.TemporaryDirectory() as tmpdir:
+			path = os.path.join(tmpdir, "design.tif")
+			self.make_synthetic_image(path, format="TIFF", compression="tiff_lzw")
+
+			previous_limit = Image.MAX_IMAGE_PIXELS
+			Image.MAX_IMAGE_PIXELS = max_image_pixels
+			try:
+				self.assertRaises(Image.DecompressionBombError, Image.open, path)
+			finally:
+				Image.MAX_IMAGE_PIXELS = previous_limit
+
+			self.assert_bounded_memory(path, max_image_pixels)
+
+	def test_memory_limit(self):
+		from textile.rotated_image import load_reduced_image
+
+		with tempfile.TemporaryDirectory() as tmpdir:
+			path = os.path.join(tmpdir, "design.png")
+			self.make_synthetic_image(path, format="PNG")
+
+			with Image.open(path) as image:
+				self.assertRaises(Exception, load_reduced_image, image, (1200, 800), memory_limit=self.memory_limit)
@@ -0,0 +1,67 @@
+# Copyright (c) 2026, ParaLogic and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe.model.document import Document
+from frappe.utils import flt
+
+
+progress_qty_fields = [
+	"qty",
+	"producible_qty",
+	"material_transferred_for_manufacturing",
+	"produced_qty",
+	"subcontract_order_qty",
+	"subcontract_received_qty",
+]
+
+
+class TextileOrderProgress(Document):
+	def autoname(self):
+		self.name = get_order_progress_name(self.order_doctype, self.order_name)
+
+
+def get_order_progress_name(order_doctype, order_name):
+	return f"{order_doctype}-{order_name}"
+
+
+def get_order_progress(order_doctype, order_name):
+	name = get_order_progress_name(order_doctype, order_name)
+	if not frappe.db.exists("Textile Order Progress", name):
+		return None
+
+	doc = frappe.get_doc("Textile Order Progress", name)
+
+	progress_data = frappe._dict({"stock_uom": doc.stock_uom, "operations": []})
+	for fieldname in progress_qty_fields:
+		progress_data[fieldname] = flt(doc.get(fieldname))
+
+	for d in doc.operations:
+		progress_data.operations.append(frappe._dict({"operation": d.operation, "completed_qty": flt(d.completed_qty)}))
+
+	return progress_data
+
+
+def update_order_progress(order_doctype, order_name, progress_data):
+	name = get_order_progress_name(order_doctype, order_name)
+	if frappe.db.exists("Textile Order Progress", name):
+		doc = frappe.get_doc("Textile Order Progress", name)
+	else:
+		doc = frappe.new_doc("Textile Order Progress")
+		doc.order_doctype = order_doctype
+		doc.order_name = order_name
+
+	doc.stock_uom = progress_data.get("stock_uom")
+	for fieldname in progress_qty_fields:
+		doc.set(fieldname, flt(progress_data.get(fieldname)))
+
+	doc.set("operations", [])
+	for d in progress_data.get("operations") or []:
+		doc.append("operations", {"operation": d.get("operation"), "completed_qty": flt(d.get("completed_qty"))})
+
+	doc.flags.ignore_permissions = True
+	doc.save()
+
+
+def delete_order_progress(order_doctype, order_name):
+	frappe.delete_doc_if_exists("Textile Order Progress", get_order_progress_name(order_doctype, order_name))
@@ -18,6 +18,10 @@ pretreatment_components = {
 
 process_components = {**printing_components, **pretreatment_components}
 
+# Compiled rule tables are kept in process memory for as long as their version in Redis is unchanged
+rule_table_expiry = 24 * 60 * 60
+rule_tables = {}
+
 
 def validate_textile_item(item_code, textile_item_type, process_component=None):
 	item = frappe.get_cached_doc("Item", item_code)
@@ -123,3 +127,46 @@ def override_sales_transaction_dashboard(data):
 		})
 
 	return data
+
+
+def bulk_insert_docs(docs):
+	# Inserts already named and validated documents with one insert statement per table
+	table_values = {}
+	for doc in docs:
+		for d in [doc] + doc.get_all_children():
+			table_values.setdefault(d.doctype, []).append(d.get_valid_dict(convert_dates_to_str=True, ignore_virtual=True))
+
+	for doctype, values in table_values.items():
+		fields = list(values[0].keys())
+		frappe.db.bulk_insert(doctype, fields, [[v.get(f) for f in fields] for v in values])
+
+
+def get_rule_table(cache_key, compile_table):
+	version = frappe.cache().get_value(f"{cache_key}_version", lambda: frappe.generate_hash(length=10))
+
+	memory_key = (frappe.local.site, cache_key)
+	if memory_key in rule_tables and rule_tables[memory_key][0] == version:
+		return rule_tables[memory_key][1]
+
+	table_key = f"{cache_key}::{version}"
+	table = frappe.cache().get_value(table_key)
+	if table is None:
+		table = compile_table()
+		frappe.cache().set_value(table_key, table, expires_in_sec=rule_table_expiry)
+
+	rule_tables[memory_key] = (version, table)
+	return table
+
+
+def clear_rule_table(cache_key):
+	# Cleared again after commit so that a table compiled from the old rows by another process is not kept,
+	# and after rollback so that a table compiled in this transaction from the uncommitted rows is not kept
+	delete_rule_table_version(cache_key)
+	frappe.db.after_commit.add(lambda: delete_rule_table_version(cache_key))
+	frappe.db.after_rollback.add(lambda: delete_rule_table_version(cache_key))
+
+
+def delete_rule_table_version(cache_key):
+	# Other processes load the table of the new version on their next lookup
+	frappe.cache().delete_value(f"{cache_key}_version")
+	rule_tables.pop((frappe.local.site, cache_key), None)